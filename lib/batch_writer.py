@@ -0,0 +1,106 @@
+"""
+Buffered multi-row writer for Supabase tables
+"""
+
+import logging
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+
+
+@dataclass
+class RowResult:
+    """Outcome of writing a single buffered row"""
+    key: Any  # Value of the conflict column for this row
+    status: str  # 'written', 'duplicate' or 'failed'
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchWriter:
+    """
+    Collect rows and write them in chunked multi-row upserts
+
+    Rows are keyed on a unique column. With ignore_duplicates, rows whose key
+    already exists are left untouched and reported as 'duplicate'; otherwise
+    they are merged. If a whole chunk is rejected, the chunk is retried row by
+    row so one bad row cannot fail its neighbours.
+    """
+
+    def __init__(self, supabase, table: str, conflict_column: str,
+                 chunk_size: int = 25, ignore_duplicates: bool = True):
+        """
+        Initialize the writer
+
+        Args:
+            supabase: Supabase client
+            table: Target table name
+            conflict_column: Unique column used for on_conflict and result matching
+            chunk_size: Rows per request
+            ignore_duplicates: If True, skip existing keys instead of updating them
+        """
+        self.supabase = supabase
+        self.table = table
+        self.conflict_column = conflict_column
+        self.chunk_size = max(1, chunk_size)
+        self.ignore_duplicates = ignore_duplicates
+        self.logger = logging.getLogger(__name__)
+
+        self._buffer: List[Dict[str, Any]] = []
+        self.results: List[RowResult] = []
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Buffer a row, flushing once a full chunk has accumulated"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> List[RowResult]:
+        """
+        Write all buffered rows
+
+        Returns:
+            Results for the rows written by this flush (also appended to self.results)
+        """
+        if not self._buffer:
+            return []
+
+        rows, self._buffer = self._buffer, []
+        try:
+            results = self._write_chunk(rows)
+        except Exception as e:
+            self.logger.warning(f"Bulk write to {self.table} failed ({str(e)[:100]}), retrying row by row")
+            results = [self._write_single(row) for row in rows]
+
+        self.results.extend(results)
+        return results
+
+    def _upsert(self, rows: List[Dict[str, Any]]):
+        return self.supabase.table(self.table).upsert(
+            rows,
+            on_conflict=self.conflict_column,
+            ignore_duplicates=self.ignore_duplicates
+        ).execute()
+
+    def _write_chunk(self, rows: List[Dict[str, Any]]) -> List[RowResult]:
+        """Write a chunk in one request and match returned rows back to input rows"""
+        result = self._upsert(rows)
+        returned = {r[self.conflict_column]: r for r in (result.data or [])}
+
+        results = []
+        for row in rows:
+            key = row[self.conflict_column]
+            if key in returned:
+                results.append(RowResult(key=key, status='written', id=returned[key].get('id')))
+            else:
+                # Ignored on conflict - row already existed
+                results.append(RowResult(key=key, status='duplicate'))
+        return results
+
+    def _write_single(self, row: Dict[str, Any]) -> RowResult:
+        """Write one row, capturing its error instead of raising"""
+        key = row[self.conflict_column]
+        try:
+            return self._write_chunk([row])[0]
+        except Exception as e:
+            self.logger.error(f"Error writing {self.table} row {key}: {str(e)}")
+            return RowResult(key=key, status='failed', error=str(e))
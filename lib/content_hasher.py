@@ -2,7 +2,12 @@
 Content hashing utilities for deduplication
 """
 
+import re
 import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from lib.text_cleaner import process_html
 
 def calculate_content_hash(content: str) -> str:
     """
@@ -28,3 +33,185 @@ def content_is_duplicate(hash1: str, hash2: str) -> bool:
         True if hashes match (duplicate content)
     """
     return hash1 == hash2
+
+# ============================================================================
+# Near-duplicate detection (SimHash)
+# ============================================================================
+
+FINGERPRINT_BITS = 64
+
+# Below this many words a SimHash is too coarse: unrelated short texts
+# land within a few bits of each other
+MIN_FINGERPRINT_TOKENS = 50
+_TAG_RE = re.compile(r'<(script|style)\b.*?</\1>|<[^>]+>', re.IGNORECASE | re.DOTALL)
+_ENTITY_RE = re.compile(r'&[#a-z0-9]+;', re.IGNORECASE)
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+def normalize_for_fingerprint(content: str) -> List[str]:
+    """
+    Reduce HTML or text to a list of lowercase word tokens
+
+    Args:
+        content: Raw HTML or plain text
+
+    Returns:
+        List of normalized tokens
+    """
+    text = _TAG_RE.sub(' ', content)
+    text = _ENTITY_RE.sub(' ', text)
+    return _NON_WORD_RE.sub(' ', text.lower()).split()
+
+def calculate_fingerprint(content: str, shingle_size: int = 4,
+                          min_tokens: int = MIN_FINGERPRINT_TOKENS) -> Optional[int]:
+    """
+    Calculate a 64-bit SimHash of word shingles
+
+    Near-identical texts (tracking params, changed footer, re-rendered markup)
+    produce fingerprints that differ in only a few bits.
+
+    Args:
+        content: Raw HTML or plain text
+        shingle_size: Number of consecutive words per shingle
+        min_tokens: Minimum number of words for a reliable fingerprint
+
+    Returns:
+        Unsigned 64-bit fingerprint, or None if there is too little text
+    """
+    tokens = normalize_for_fingerprint(content)
+    if len(tokens) < max(shingle_size, min_tokens):
+        return None
+
+    shingles = {' '.join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in shingles
+    ]
+
+    threshold = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        mask = 1 << bit
+        if sum(1 for h in hashes if h & mask) > threshold:
+            fingerprint |= mask
+
+    return fingerprint
+
+def calculate_document_fingerprint(raw_content: str, fetched_page: bool,
+                                   feed_content: Optional[str] = None) -> Optional[int]:
+    """
+    Fingerprint a document's article text rather than its whole page
+
+    Navigation, sidebars and footers shared by every page of a site would
+    otherwise dominate the fingerprint and pull unrelated articles within
+    matching distance of each other.
+
+    Args:
+        raw_content: Stored document content
+        fetched_page: True if raw_content is a fetched web page (not feed content)
+        feed_content: Feed entry content, used when a page's main text can't be found
+
+    Returns:
+        Unsigned 64-bit fingerprint, or None if there is no reliable text to fingerprint
+    """
+    if not fetched_page:
+        return calculate_fingerprint(raw_content or '')
+
+    processed = process_html(raw_content or '', main_content=True)
+    if processed.content_path is not None:
+        return calculate_fingerprint(processed.cleaned_text)
+    return calculate_fingerprint(feed_content) if feed_content else None
+
+def hamming_distance(fp1: int, fp2: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return bin(fp1 ^ fp2).count('1')
+
+def fingerprint_to_db(fingerprint: Optional[int]) -> Optional[int]:
+    """Convert an unsigned fingerprint to a signed value for a Postgres BIGINT column"""
+    if fingerprint is None:
+        return None
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+def fingerprint_from_db(value: Optional[int]) -> Optional[int]:
+    """Convert a signed BIGINT column value back to an unsigned fingerprint"""
+    if value is None:
+        return None
+    return value + (1 << 64) if value < 0 else value
+
+class NearDuplicateIndex:
+    """
+    In-memory SimHash index for near-duplicate lookups
+
+    Fingerprints are split into bands; by the pigeonhole principle any two
+    fingerprints within max_distance bits share at least one identical band
+    when max_distance < number of bands, so lookups only compare a handful
+    of candidates instead of the whole corpus.
+    """
+
+    def __init__(self, max_distance: int = 3, bands: int = 4):
+        """
+        Initialize the index
+
+        Args:
+            max_distance: Maximum Hamming distance that counts as a near-duplicate
+            bands: Number of bands (must exceed max_distance)
+        """
+        if bands <= max_distance:
+            raise ValueError("bands must be greater than max_distance")
+
+        self.max_distance = max_distance
+        self.bands = bands
+        self.band_bits = FINGERPRINT_BITS // bands
+        self._band_mask = (1 << self.band_bits) - 1
+        self._buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> (i * self.band_bits)) & self._band_mask for i in range(self.bands)]
+
+    def add(self, fingerprint: Optional[int], doc_id: str) -> None:
+        """Add a document fingerprint to the index"""
+        if fingerprint is None:
+            return
+        with self._lock:
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                self._buckets[band].setdefault(key, []).append((fingerprint, doc_id))
+            self.size += 1
+
+    def remove(self, fingerprint: Optional[int], doc_id: str) -> None:
+        """Remove a document fingerprint added with add()"""
+        if fingerprint is None:
+            return
+        with self._lock:
+            removed = False
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                bucket = self._buckets[band].get(key)
+                if bucket and (fingerprint, doc_id) in bucket:
+                    bucket.remove((fingerprint, doc_id))
+                    removed = True
+                    if not bucket:
+                        del self._buckets[band][key]
+            if removed:
+                self.size -= 1
+
+    def find(self, fingerprint: Optional[int]) -> Optional[str]:
+        """
+        Find an indexed near-duplicate
+
+        Args:
+            fingerprint: Fingerprint to look up
+
+        Returns:
+            ID of the closest indexed document within max_distance, or None
+        """
+        if fingerprint is None:
+            return None
+
+        best_id, best_distance = None, self.max_distance + 1
+        with self._lock:
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                for candidate, doc_id in self._buckets[band].get(key, ()):
+                    distance = hamming_distance(fingerprint, candidate)
+                    if distance < best_distance:
+                        best_id, best_distance = doc_id, distance
+        return best_id
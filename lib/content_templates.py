@@ -0,0 +1,293 @@
+"""
+Main-content detection with learned per-domain templates
+
+A density-scoring pass (in the spirit of Readability) finds the element
+holding the article body. Once several pages of a domain agree on that
+element's DOM path, the path is kept as the domain's template and later
+pages are resolved with a single CSS lookup instead of scoring the page.
+"""
+
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup, Tag
+
+DEFAULT_TEMPLATES_PATH = Path(__file__).parent.parent / ".cache" / "content_templates.json"
+
+MIN_CONTENT_CHARS = 250
+
+_POSITIVE_RE = re.compile(r'article|body|content|entry|main|post|story|text|prose', re.IGNORECASE)
+_NEGATIVE_RE = re.compile(
+    r'comment|sidebar|footer|masthead|nav|menu|share|social|newsletter|subscribe|signup|'
+    r'related|recommend|promo|sponsor|advert|\bads?\b|cookie|banner|popup|modal|widget|'
+    r'breadcrumb|author-bio|tags',
+    re.IGNORECASE
+)
+_CSS_NAME_RE = re.compile(r'^-?[A-Za-z_][\w-]*$')
+_TAG_WEIGHTS = {'article': 10, 'main': 5, 'div': 5, 'section': 3, 'pre': 3, 'td': 3, 'blockquote': 3,
+                'form': -3, 'ul': -3, 'ol': -3, 'th': -5, 'h1': -5, 'h2': -5, 'h3': -5}
+
+def content_domain(url: Optional[str]) -> Optional[str]:
+    """Return the domain templates are keyed on (host without www.), or None"""
+    if not url:
+        return None
+    host = (urlparse(url).hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host or None
+
+def _class_weight(tag: Tag) -> int:
+    weight = 0
+    for value in (' '.join(tag.get('class') or []), tag.get('id') or ''):
+        if not value:
+            continue
+        if _NEGATIVE_RE.search(value):
+            weight -= 25
+        if _POSITIVE_RE.search(value):
+            weight += 25
+    return weight
+
+# Elements never holding the article body; their paragraphs are not scored
+_UNLIKELY_TAGS = {'nav', 'aside', 'footer', 'header'}
+
+def _is_unlikely(tag: Tag) -> bool:
+    """Whether a paragraph sits inside page chrome (nav, sidebar, footer, comments...)"""
+    node = tag.parent
+    while isinstance(node, Tag) and node.name not in ('html', 'body', '[document]'):
+        if node.name in _UNLIKELY_TAGS:
+            return True
+        hints = ' '.join(node.get('class') or []) + ' ' + (node.get('id') or '')
+        if _NEGATIVE_RE.search(hints) and not _POSITIVE_RE.search(hints):
+            return True
+        node = node.parent
+    return False
+
+def _link_density(tag: Tag, text_length: int) -> float:
+    if not text_length:
+        return 1.0
+    link_length = sum(len(a.get_text(strip=True)) for a in tag.find_all('a'))
+    return min(1.0, link_length / text_length)
+
+def find_main_content(soup: BeautifulSoup, min_chars: int = MIN_CONTENT_CHARS) -> Optional[Tag]:
+    """
+    Find the element holding a page's main text by paragraph density scoring
+
+    Every substantial paragraph outside page chrome (nav, aside, footer,
+    sidebar/comment-like classes) adds to its parent's score (half to its
+    grandparent). Candidates are weighted by tag and by class/id hints and
+    penalized by link density; the best one wins.
+
+    Args:
+        soup: Parsed page
+        min_chars: Minimum text length for the winner to be accepted
+
+    Returns:
+        The main content element, or None if no element stands out from the page
+    """
+    candidates: Dict[int, List[Any]] = {}
+
+    for paragraph in soup.find_all(['p', 'pre', 'blockquote']):
+        text = paragraph.get_text(' ', strip=True)
+        if len(text) < 25 or _is_unlikely(paragraph):
+            continue
+
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        for node, factor in ((paragraph.parent, 1.0), (paragraph.parent.parent if paragraph.parent else None, 0.5)):
+            if not isinstance(node, Tag) or node.name in ('html', 'body', '[document]'):
+                continue
+            entry = candidates.get(id(node))
+            if entry is None:
+                entry = candidates[id(node)] = [node, _TAG_WEIGHTS.get(node.name, 0) + _class_weight(node)]
+            entry[1] += score * factor
+
+    scored = []
+    for node, score in candidates.values():
+        text_length = len(node.get_text(strip=True))
+        scored.append((node, score * (1 - _link_density(node, text_length)), text_length))
+    if not scored:
+        return None
+
+    best, best_score, best_length = max(scored, key=lambda item: item[1])
+
+    # Article split across sibling containers: take their common parent,
+    # as long as it isn't the whole page or mostly links
+    threshold = max(10.0, best_score * 0.2)
+    parent = best.parent
+    if isinstance(parent, Tag) and parent.name not in ('html', 'body', '[document]') and any(
+            node is not best and node.parent is parent and score >= threshold
+            for node, score, _ in scored):
+        parent_length = len(parent.get_text(strip=True))
+        if _link_density(parent, parent_length) < 0.33:
+            best, best_length = parent, parent_length
+
+    if best_score <= 0 or best_length < min_chars:
+        return None
+    return best
+
+def _step(tag: Tag) -> Tuple[str, bool]:
+    """CSS step for one element and whether it is anchored by a stable id"""
+    tag_id = tag.get('id')
+    if tag_id and _CSS_NAME_RE.match(tag_id) and not re.search(r'\d', tag_id):
+        return f"{tag.name}#{tag_id}", True
+
+    classes = sorted(c for c in (tag.get('class') or [])
+                     if _CSS_NAME_RE.match(c) and not re.search(r'\d', c))[:3]
+    return tag.name + ''.join(f".{c}" for c in classes), False
+
+def dom_path(tag: Tag) -> Optional[str]:
+    """
+    Build a CSS selector for an element that should match it across pages
+
+    Ids and classes containing digits (usually per-page) are ignored; the
+    path starts at the nearest ancestor with a stable id.
+
+    Args:
+        tag: Element to describe
+
+    Returns:
+        Child-combinator CSS selector, or None for html/body
+    """
+    if tag.name in ('html', 'body', '[document]'):
+        return None
+
+    steps = []
+    node = tag
+    while isinstance(node, Tag) and node.name != '[document]':
+        step, anchored = _step(node)
+        steps.append(step)
+        if anchored:
+            break
+        node = node.parent
+    return ' > '.join(reversed(steps))
+
+def select_main_content(soup: BeautifulSoup, template_path: Optional[str] = None,
+                        min_chars: int = MIN_CONTENT_CHARS) -> Tuple[Optional[Tag], Optional[str], bool]:
+    """
+    Locate a page's main content, trying a learned template first
+
+    Args:
+        soup: Parsed page
+        template_path: CSS selector learned for the page's domain, if any
+        min_chars: Minimum text length for a match to count
+
+    Returns:
+        (element or None for "use the whole page", DOM path found by density
+        scoring or None, whether the template matched)
+    """
+    if template_path:
+        try:
+            node = soup.select_one(template_path)
+        except Exception:
+            node = None
+        if node is not None and len(node.get_text(strip=True)) >= min_chars:
+            return node, template_path, True
+
+    node = find_main_content(soup, min_chars=min_chars)
+    if node is None:
+        return None, None, False
+    return node, dom_path(node), False
+
+
+class ContentTemplateStore:
+    """
+    Persistent per-domain main-content templates
+
+    Paths found by density scoring are recorded per domain; once min_samples
+    recent observations mostly agree, that path becomes the domain's
+    template. A template that stops matching for max_misses pages in a row
+    is dropped and relearned.
+    """
+
+    def __init__(self, path: Optional[Path] = None, min_samples: int = 3,
+                 agreement: float = 0.6, max_observations: int = 5, max_misses: int = 3):
+        """
+        Initialize the store, loading saved templates if present
+
+        Args:
+            path: JSON file to persist templates in (default: .cache/content_templates.json)
+            min_samples: Observations needed before a template is adopted
+            agreement: Share of recent observations that must agree on the path
+            max_observations: Recent observations kept per domain
+            max_misses: Consecutive template misses before the template is dropped
+        """
+        self.path = Path(path) if path else DEFAULT_TEMPLATES_PATH
+        self.min_samples = min_samples
+        self.agreement = agreement
+        self.max_observations = max_observations
+        self.max_misses = max_misses
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._domains: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Load templates from disk, starting empty if missing or corrupt"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                self._domains = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable content templates {self.path}: {str(e)}")
+            self._domains = {}
+
+    def save(self) -> None:
+        """Write templates to disk"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self._domains, f, indent=2, sort_keys=True)
+            tmp_path.replace(self.path)
+
+    def template_for(self, domain: Optional[str]) -> Optional[str]:
+        """Return the learned template path for a domain, if any"""
+        if not domain:
+            return None
+        with self._lock:
+            return self._domains.get(domain, {}).get('template')
+
+    def record(self, domain: Optional[str], content_path: Optional[str], template_hit: bool) -> None:
+        """
+        Learn from one extracted page
+
+        Args:
+            domain: Page domain
+            content_path: Path used for the page (template or density result)
+            template_hit: Whether the domain's template matched
+        """
+        if not domain:
+            return
+
+        with self._lock:
+            state = self._domains.setdefault(domain, {"template": None, "observations": [], "misses": 0})
+
+            if template_hit:
+                state['misses'] = 0
+                return
+
+            if state['template']:
+                state['misses'] += 1
+                if state['misses'] >= self.max_misses:
+                    self.logger.info(f"Dropping content template for {domain}: {state['template']}")
+                    state['template'] = None
+                    state['observations'] = []
+                    state['misses'] = 0
+
+            state['observations'] = ([content_path] + state['observations'])[:self.max_observations]
+
+            observations = state['observations']
+            if state['template'] or len(observations) < self.min_samples:
+                return
+            path, count = Counter(observations).most_common(1)[0]
+            if path and count / len(observations) >= self.agreement:
+                state['template'] = path
+                state['misses'] = 0
+                self.logger.info(f"Learned content template for {domain}: {path}")
@@ -0,0 +1,136 @@
+"""
+Per-domain circuit breaker for article fetching
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+
+DEFAULT_BREAKER_PATH = Path(__file__).parent.parent / ".cache" / "domain_breakers.json"
+
+
+class DomainCircuitBreaker:
+    """
+    Persistent circuit breaker keyed on domain
+
+    After failure_threshold consecutive failures a domain's circuit opens and
+    requests to it are refused until the cooldown passes. The next request is
+    then let through as a probe: success closes the circuit, failure re-opens
+    it with a doubled cooldown. State is saved between runs, so a domain that
+    keeps failing stays skipped (and is tried last) across runs.
+    """
+
+    def __init__(self, path: Optional[Path] = None, failure_threshold: int = 3,
+                 cooldown: timedelta = timedelta(hours=1),
+                 max_cooldown: timedelta = timedelta(days=7)):
+        """
+        Initialize the breaker, loading saved state if present
+
+        Args:
+            path: JSON file to persist state in (default: .cache/domain_breakers.json)
+            failure_threshold: Consecutive failures that open a domain's circuit
+            cooldown: How long a circuit stays open after its first trip
+            max_cooldown: Upper bound on the cooldown of repeatedly tripped domains
+        """
+        self.path = Path(path) if path else DEFAULT_BREAKER_PATH
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._domains: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Load state from disk, starting empty if missing or corrupt"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                self._domains = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable breaker state {self.path}: {str(e)}")
+            self._domains = {}
+
+    def save(self) -> None:
+        """Write breaker state to disk"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self._domains, f, indent=2, sort_keys=True)
+            tmp_path.replace(self.path)
+
+    def allow(self, domain: str) -> bool:
+        """
+        Check whether a request to a domain may go ahead
+
+        Args:
+            domain: Domain (netloc) of the URL about to be fetched
+
+        Returns:
+            False while the domain's circuit is open
+        """
+        with self._lock:
+            state = self._domains.get(domain)
+        if not state or not state.get('open_until'):
+            return True
+        return datetime.now() >= datetime.fromisoformat(state['open_until'])
+
+    def open_until(self, domain: str) -> Optional[datetime]:
+        """Return when a domain's open circuit may be probed again, or None if closed"""
+        with self._lock:
+            state = self._domains.get(domain)
+        if not state or not state.get('open_until'):
+            return None
+        until = datetime.fromisoformat(state['open_until'])
+        return until if until > datetime.now() else None
+
+    def trips(self, domain: str) -> int:
+        """Number of consecutive times a domain's circuit has opened (0 if healthy)"""
+        with self._lock:
+            return self._domains.get(domain, {}).get('trips', 0)
+
+    def record_success(self, domain: str) -> None:
+        """Close a domain's circuit and forget its failures"""
+        with self._lock:
+            if self._domains.pop(domain, None):
+                self.logger.info(f"Circuit closed for {domain}")
+
+    def record_failure(self, domain: str, error: str = "") -> bool:
+        """
+        Count a failed request to a domain, opening its circuit at the threshold
+
+        Args:
+            domain: Domain that failed
+            error: Short description of the failure
+
+        Returns:
+            True if this failure opened the circuit
+        """
+        now = datetime.now()
+        with self._lock:
+            state = self._domains.setdefault(domain, {"failures": 0, "trips": 0, "open_until": None})
+            state['failures'] += 1
+            state['last_failure'] = now.isoformat()
+            state['last_error'] = error[:200]
+
+            if state['failures'] < self.failure_threshold:
+                return False
+
+            # Requests already in flight when the circuit opened don't extend it
+            if state['open_until'] and datetime.fromisoformat(state['open_until']) > now:
+                return False
+
+            # Repeated trips back off exponentially so chronic failures stay skipped longer
+            state['trips'] += 1
+            cooldown = min(self.max_cooldown, self.cooldown * (2 ** (state['trips'] - 1)))
+            state['open_until'] = (now + cooldown).isoformat()
+            # failures stays at the threshold, so a failed probe re-opens at once
+
+        self.logger.warning(f"Circuit opened for {domain} for {cooldown} after repeated failures: {error[:100]}")
+        return True
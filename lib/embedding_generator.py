@@ -3,13 +3,44 @@ Embedding generation utilities using OpenAI API
 """
 
 import os
-from typing import List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
 from openai import OpenAI
 from dotenv import load_dotenv
 
+try:
+    import tiktoken
+except ImportError:  # optional: exact token counts instead of estimates
+    tiktoken = None
+
 # Load environment variables
 load_dotenv()
 
+# OpenAI embeddings API limits
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+
+# Per-input token limit; longer inputs make the API reject the whole request
+MAX_INPUT_TOKENS = 8191
+
+# Without tiktoken, tokens are estimated at 3 chars each. English prose
+# averages ~4, but code and non-English text run denser, so the estimate
+# errs high and inputs are cut to the chars that fit MAX_INPUT_TOKENS
+CHARS_PER_TOKEN = 3
+MAX_INPUT_CHARS = MAX_INPUT_TOKENS * CHARS_PER_TOKEN
+
+# Default per-request token budget, kept below the API cap as a margin
+# for estimated token counts
+DEFAULT_BATCH_TOKENS = 250_000
+
+# Tokenizer of the text-embedding-3 models
+TOKENIZER_ENCODING = 'cl100k_base'
+
+# Significant digits sent when writing vectors; pgvector stores float4,
+# which holds ~7 significant digits
+VECTOR_DIGITS = 7
+
+T = TypeVar('T')
+
 def get_openai_client() -> OpenAI:
     """
     Create and return OpenAI client
@@ -27,6 +58,87 @@ def get_openai_client() -> OpenAI:
 
     return OpenAI(api_key=api_key)
 
+_encoding = None
+
+def _get_encoding():
+    """Return the embedding models' tokenizer, or None if tiktoken isn't installed"""
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+    return _encoding
+
+def truncate_for_embedding(text: str) -> str:
+    """
+    Cut text to fit the API's per-input token limit
+
+    With tiktoken the text is cut at MAX_INPUT_TOKENS tokens; without it,
+    at MAX_INPUT_CHARS characters.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:MAX_INPUT_CHARS] if len(text) > MAX_INPUT_CHARS else text
+
+    # Bound the text tokenized; tokens average well under 8 chars
+    head = text[:MAX_INPUT_TOKENS * 8]
+    tokens = encoding.encode(head, disallowed_special=())
+    if len(tokens) <= MAX_INPUT_TOKENS:
+        return head
+    return encoding.decode(tokens[:MAX_INPUT_TOKENS])
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the tokens an input costs once truncated
+
+    Counts exactly with tiktoken if installed, otherwise assumes
+    CHARS_PER_TOKEN chars per token (an overestimate for most text).
+
+    Args:
+        text: Text to embed
+
+    Returns:
+        Estimated token count (at least 1)
+    """
+    text = truncate_for_embedding(text)
+    encoding = _get_encoding()
+    if encoding is not None:
+        return max(1, len(encoding.encode(text, disallowed_special=())))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def plan_batches(items: Iterable[T], get_text: Callable[[T], str],
+                 max_tokens: int = DEFAULT_BATCH_TOKENS,
+                 max_inputs: int = MAX_INPUTS_PER_REQUEST) -> Iterator[List[T]]:
+    """
+    Pack items into embedding requests by estimated token count
+
+    Items are taken in order and a request is closed when adding the next
+    item would exceed max_tokens or max_inputs. Works on a stream: only the
+    request being filled is held.
+
+    Args:
+        items: Items to embed
+        get_text: Returns the text to embed for an item
+        max_tokens: Estimated token budget per request
+        max_inputs: Inputs per request (capped at the API limit)
+
+    Yields:
+        Lists of items, one per request
+    """
+    max_inputs = max(1, min(max_inputs, MAX_INPUTS_PER_REQUEST))
+    max_tokens = min(max_tokens, MAX_TOKENS_PER_REQUEST)
+
+    batch: List[T] = []
+    batch_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(get_text(item))
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_inputs):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+
+    if batch:
+        yield batch
+
 def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
     """
     Generate embedding vector for text
@@ -45,10 +157,8 @@ def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List
     """
     client = get_openai_client()
 
-    # Truncate text if too long (max 8191 tokens ≈ 32,000 chars)
-    # For safety, limit to 30,000 chars
-    if len(text) > 30000:
-        text = text[:30000]
+    # Truncate text if too long (max 8191 tokens)
+    text = truncate_for_embedding(text)
 
     # Generate embedding
     response = client.embeddings.create(
@@ -79,11 +189,11 @@ def generate_embeddings_batch(texts: List[str], model: str = "text-embedding-3-s
     client = get_openai_client()
 
     # Truncate texts if too long
-    truncated_texts = [t[:30000] if len(t) > 30000 else t for t in texts]
+    truncated_texts = [truncate_for_embedding(t) for t in texts]
 
     # OpenAI allows up to 2048 inputs per request
-    if len(truncated_texts) > 2048:
-        raise ValueError("Too many texts (max 2048 per batch)")
+    if len(truncated_texts) > MAX_INPUTS_PER_REQUEST:
+        raise ValueError(f"Too many texts (max {MAX_INPUTS_PER_REQUEST} per batch)")
 
     # Generate embeddings
     response = client.embeddings.create(
@@ -97,6 +207,20 @@ def generate_embeddings_batch(texts: List[str], model: str = "text-embedding-3-s
 
     return embeddings
 
+def encode_vector(embedding: List[float], digits: int = VECTOR_DIGITS) -> str:
+    """
+    Encode an embedding as a compact pgvector text literal
+
+    Args:
+        embedding: Embedding vector
+        digits: Significant digits per component
+
+    Returns:
+        Literal like '[0.0123457,-0.00456789]', castable to vector in SQL
+    """
+    fmt = f"%.{digits}g"
+    return '[' + ','.join(fmt % x for x in embedding) + ']'
+
 def calculate_cosine_similarity(embedding1: List[float], embedding2: List[float]) -> float:
     """
     Calculate cosine similarity between two embeddings
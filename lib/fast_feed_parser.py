@@ -0,0 +1,224 @@
+"""
+Fast lxml-based RSS 2.0 / Atom parsing engine
+
+Handles the feed shapes our sources actually publish and produces the same
+FeedEntry fields as the feedparser path. Entries are produced lazily while
+the document streams, so a caller that stops early stops parsing too.
+Anything unusual (RSS 1.0/RDF, malformed XML, entries without links,
+unknown content types, xml:base) raises UnsupportedFeed - possibly after
+some entries were produced - so the caller can fall back to feedparser.
+
+Unlike feedparser, entry HTML is not sanitized here; the extraction stage
+strips scripts/styles before anything is stored downstream.
+"""
+
+from io import BytesIO
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from lxml import etree
+
+from lib.feed_parser import FeedEntry
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+CONTENT_NS = 'http://purl.org/rss/1.0/modules/content/'
+DC_NS = 'http://purl.org/dc/elements/1.1/'
+XHTML_NS = 'http://www.w3.org/1999/xhtml'
+XML_BASE = '{http://www.w3.org/XML/1998/namespace}base'
+
+class UnsupportedFeed(Exception):
+    """Feed the fast engine does not handle - parse it with feedparser instead"""
+
+class _Unsupported(Exception):
+    """Feed shape the fast engine does not handle"""
+
+def iter_entries_fast(body: bytes, include_raw: bool = False) -> Iterator[FeedEntry]:
+    """
+    Parse an RSS 2.0 or Atom feed body with lxml, one entry at a time
+
+    Args:
+        body: Raw feed bytes (encoding taken from the XML declaration)
+        include_raw: If True, store a dict of the entry's child element texts on raw_entry
+
+    Yields:
+        FeedEntry objects in document order
+
+    Raises:
+        UnsupportedFeed: Feed needs feedparser; entries yielded before are
+                         the document's first entries and are valid
+    """
+    try:
+        yield from _parse(body, include_raw)
+    except (_Unsupported, etree.XMLSyntaxError, ValueError, TypeError) as e:
+        raise UnsupportedFeed(str(e)) from e
+
+def parse_entries_fast(body: bytes, include_raw: bool = False) -> Optional[List[FeedEntry]]:
+    """
+    Parse a whole RSS 2.0 or Atom feed body with lxml
+
+    Args:
+        body: Raw feed bytes (encoding taken from the XML declaration)
+        include_raw: If True, store a dict of the entry's child element texts on raw_entry
+
+    Returns:
+        List of FeedEntry objects in document order, or None to request a
+        feedparser fallback
+    """
+    try:
+        return list(iter_entries_fast(body, include_raw))
+    except UnsupportedFeed:
+        return None
+
+def _parse(body: bytes, include_raw: bool) -> Iterator[FeedEntry]:
+    root_tag = None
+
+    # Stream the document and free each item once converted
+    context = etree.iterparse(
+        BytesIO(body), events=('start', 'end'),
+        resolve_entities=False, no_network=True, huge_tree=False, recover=False
+    )
+    for event, element in context:
+        # feedparser resolves relative links against xml:base; leave that to it
+        if event == 'start' and element.get(XML_BASE) is not None:
+            raise _Unsupported('xml:base')
+
+        if root_tag is None:
+            root_tag = element.tag
+            if root_tag not in ('rss', f'{{{ATOM_NS}}}feed'):
+                raise _Unsupported(root_tag)
+            continue
+
+        if event != 'end':
+            continue
+
+        tag = element.tag
+        if root_tag == 'rss' and tag == 'item':
+            entry = _rss_item(element, include_raw)
+            _release(element)
+            yield entry
+        elif root_tag != 'rss' and tag == f'{{{ATOM_NS}}}entry':
+            entry = _atom_entry(element, include_raw)
+            _release(element)
+            yield entry
+
+    if root_tag is None:
+        raise _Unsupported('empty document')
+
+def _release(element) -> None:
+    """Clear a processed element and its already-processed siblings"""
+    element.clear()
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+def _text(element) -> str:
+    if element is None:
+        return ''
+    return ''.join(element.itertext()).strip()
+
+def _raw_dict(element) -> Dict[str, Any]:
+    return {etree.QName(child).localname: _text(child) for child in element if isinstance(child.tag, str)}
+
+def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Match feedparser: convert to UTC and drop tzinfo (naive values are taken as UTC)"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+def _parse_rfc822(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return _to_naive_utc(parsedate_to_datetime(value))
+    except (TypeError, ValueError, IndexError):
+        raise _Unsupported(f"date {value!r}")
+
+def _parse_iso8601(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return _to_naive_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise _Unsupported(f"date {value!r}")
+
+def _rss_item(item, include_raw: bool) -> FeedEntry:
+    link = _text(item.find('link'))
+    if not link:
+        guid = item.find('guid')
+        if guid is not None and guid.get('isPermaLink', 'true') != 'false':
+            link = _text(guid)
+    if not link:
+        raise _Unsupported('item without link')
+
+    description = _text(item.find('description'))
+    encoded = item.find(f'{{{CONTENT_NS}}}encoded')
+    content = _text(encoded) if encoded is not None and _text(encoded) else description
+
+    author = _text(item.find('author')) or _text(item.find(f'{{{DC_NS}}}creator')) or None
+
+    published_at = _parse_rfc822(_text(item.find('pubDate')))
+    if published_at is None:
+        published_at = _parse_iso8601(_text(item.find(f'{{{DC_NS}}}date')))
+
+    return FeedEntry(
+        title=_text(item.find('title')) or 'Untitled',
+        url=link,
+        author=author,
+        published_at=published_at,
+        content=content,
+        # feedparser falls back to the content when there is no description
+        summary=description or content,
+        raw_entry=_raw_dict(item) if include_raw else None
+    )
+
+def _atom_content(element) -> str:
+    """Return the HTML of an Atom text construct (text, html or xhtml)"""
+    if element is None:
+        return ''
+
+    content_type = element.get('type', 'text')
+    if content_type in ('text', 'html', 'text/html', 'text/plain'):
+        return (element.text or '').strip()
+    if content_type == 'xhtml':
+        div = element.find(f'{{{XHTML_NS}}}div')
+        if div is None:
+            raise _Unsupported('xhtml content without div')
+        parts = [div.text or '']
+        for child in div:
+            etree.cleanup_namespaces(child)
+            parts.append(etree.tostring(child, encoding='unicode', with_tail=True))
+        return ''.join(parts).replace(f' xmlns="{XHTML_NS}"', '').strip()
+
+    raise _Unsupported(f"content type {content_type}")
+
+def _atom_entry(entry, include_raw: bool) -> FeedEntry:
+    link = ''
+    for link_el in entry.findall(f'{{{ATOM_NS}}}link'):
+        if link_el.get('rel', 'alternate') == 'alternate':
+            link = link_el.get('href', '')
+            break
+    if not link:
+        raise _Unsupported('entry without alternate link')
+    # Relative links are kept as written, like feedparser does without xml:base
+
+    summary = _atom_content(entry.find(f'{{{ATOM_NS}}}summary'))
+    content = _atom_content(entry.find(f'{{{ATOM_NS}}}content')) or summary
+
+    author = _text(entry.find(f'{{{ATOM_NS}}}author/{{{ATOM_NS}}}name')) or None
+
+    published_at = _parse_iso8601(_text(entry.find(f'{{{ATOM_NS}}}published')))
+    if published_at is None:
+        published_at = _parse_iso8601(_text(entry.find(f'{{{ATOM_NS}}}updated')))
+
+    return FeedEntry(
+        title=_text(entry.find(f'{{{ATOM_NS}}}title')) or 'Untitled',
+        url=link,
+        author=author,
+        published_at=published_at,
+        content=content,
+        # feedparser falls back to the content when there is no summary
+        summary=summary or content,
+        raw_entry=_raw_dict(entry) if include_raw else None
+    )
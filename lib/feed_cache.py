@@ -0,0 +1,123 @@
+"""
+Feed validator cache for conditional GET requests (ETag / Last-Modified)
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from datetime import datetime
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "feed_validators.json"
+
+
+class FeedValidatorCache:
+    """
+    Persistent per-feed cache of HTTP validators and body hashes
+
+    Validators are staged while a feed is being processed and only committed
+    once the caller has finished with the feed, so a failed run never hides
+    entries from the next one.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize the cache
+
+        Args:
+            path: JSON file to persist validators in (default: .cache/feed_validators.json)
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Load cache from disk, starting empty if missing or corrupt"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable feed cache {self.path}: {str(e)}")
+            self._entries = {}
+
+    def save(self) -> None:
+        """Write committed validators to disk"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            tmp_path.replace(self.path)
+
+    def get_conditional_headers(self, feed_url: str) -> Dict[str, str]:
+        """
+        Build conditional request headers for a feed
+
+        Args:
+            feed_url: URL of RSS/Atom feed
+
+        Returns:
+            Dict with If-None-Match / If-Modified-Since when known
+        """
+        with self._lock:
+            entry = self._entries.get(feed_url, {})
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body_unchanged(self, feed_url: str, body_hash: str) -> bool:
+        """
+        Check whether a downloaded body matches the last committed one
+
+        Args:
+            feed_url: URL of RSS/Atom feed
+            body_hash: Hash of the newly downloaded body
+
+        Returns:
+            True if the feed body is identical to the cached one
+        """
+        with self._lock:
+            entry = self._entries.get(feed_url)
+        return bool(entry) and entry.get('body_hash') == body_hash
+
+    def stage(self, feed_url: str, etag: Optional[str], last_modified: Optional[str],
+              body_hash: str) -> None:
+        """
+        Record validators for a feed, pending commit
+
+        Args:
+            feed_url: URL of RSS/Atom feed
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            body_hash: Hash of the response body
+        """
+        with self._lock:
+            self._pending[feed_url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "body_hash": body_hash,
+                "updated_at": datetime.now().isoformat()
+            }
+
+    def commit(self, feed_url: str) -> None:
+        """Promote staged validators for a feed once it was fully processed"""
+        with self._lock:
+            pending = self._pending.pop(feed_url, None)
+            if pending:
+                self._entries[feed_url] = pending
+
+    def discard(self, feed_url: str) -> None:
+        """Drop staged validators for a feed that failed to process"""
+        with self._lock:
+            self._pending.pop(feed_url, None)
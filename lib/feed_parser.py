@@ -3,10 +3,17 @@ RSS/Atom feed parsing utilities
 """
 
 import feedparser
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Callable
 from datetime import datetime
 from dataclasses import dataclass
 import requests
+import hashlib
+
+logger = logging.getLogger(__name__)
+
+class FeedNotModified(Exception):
+    """Raised when a feed has not changed since the last committed fetch"""
 
 @dataclass
 class FeedEntry:
@@ -17,15 +24,17 @@ class FeedEntry:
     published_at: Optional[datetime]
     content: str  # Full text content
     summary: str  # Short summary/excerpt
-    raw_entry: Dict[str, Any]  # Original feedparser entry
+    raw_entry: Optional[Dict[str, Any]] = None  # Original feedparser entry (if requested)
 
-def parse_feed(feed_url: str, timeout: int = 30) -> List[FeedEntry]:
+def parse_feed(feed_url: str, timeout: int = 30, cache=None) -> List[FeedEntry]:
     """
     Parse RSS/Atom feed and return structured entries
 
     Args:
         feed_url: URL of RSS/Atom feed
         timeout: Request timeout in seconds
+        cache: Optional FeedValidatorCache for conditional GET requests.
+               New validators are staged; the caller commits them.
 
     Returns:
         List of FeedEntry objects
@@ -33,28 +42,179 @@ def parse_feed(feed_url: str, timeout: int = 30) -> List[FeedEntry]:
     Raises:
         requests.exceptions.RequestException: Network errors
         ValueError: Malformed feed
+        FeedNotModified: Feed unchanged since last commit (only with cache)
+    """
+    return list(iter_feed_entries(feed_url, timeout=timeout, cache=cache, include_raw=True))
+
+def iter_feed_entries(feed_url: str, cutoff_date: Optional[datetime] = None, timeout: int = 30,
+                      cache=None, include_raw: bool = False,
+                      stop_after_old: int = 3, response_cache=None,
+                      engine: str = 'feedparser') -> Iterator[FeedEntry]:
+    """
+    Fetch a feed and lazily yield entries published on or after a cutoff
+
+    The feed is fetched and parsed eagerly (so errors surface at call time),
+    but FeedEntry objects are only built for entries inside the window.
+    Undated entries are always yielded. When the feed is sorted newest-first,
+    iteration stops after stop_after_old consecutive entries older than the
+    cutoff; the run of several guards against an old pinned post at the top.
+
+    Args:
+        feed_url: URL of RSS/Atom feed
+        cutoff_date: Skip entries published before this (None = yield everything)
+        timeout: Request timeout in seconds
+        cache: Optional FeedValidatorCache for conditional GET requests
+        include_raw: If True, keep the original feedparser entry on raw_entry
+        stop_after_old: Consecutive too-old entries that end a date-sorted feed
+        response_cache: Optional ResponseCache to store feed bodies in, or
+                        replay them from when it is in offline mode
+        engine: 'feedparser', or 'lxml' for the fast engine (falls back to
+                feedparser on feeds it does not handle)
+
+    Returns:
+        Iterator of FeedEntry objects
+
+    Raises:
+        requests.exceptions.RequestException: Network errors
+        ValueError: Malformed feed (or missing from an offline cache)
+        FeedNotModified: Feed unchanged since last commit (only with cache)
+    """
+    if engine not in ('feedparser', 'lxml'):
+        raise ValueError(f"Unknown feed engine: {engine}")
+
+    body = _fetch_body(feed_url, timeout, cache, response_cache)
+
+    if engine == 'lxml':
+        if isinstance(body, bytes):
+            # Lazy, so the early stop on sorted feeds also stops parsing
+            return _iter_entries(_iter_fast_entries(feed_url, body, include_raw), cutoff_date, stop_after_old,
+                                 date_of=lambda e: e.published_at, build=lambda e: e)
+        # Decoded text from a cache entry written before raw bytes were kept
+        logger.warning(f"Cached feed body for {feed_url} is not raw bytes, using feedparser")
+
+    feed = _parse_body(body)
+    return _iter_entries(feed.entries, cutoff_date, stop_after_old,
+                         date_of=_entry_date,
+                         build=lambda e: _parse_entry(e, include_raw=include_raw))
+
+def _iter_fast_entries(feed_url: str, body: bytes, include_raw: bool) -> Iterator[FeedEntry]:
     """
+    Yield entries from the lxml engine, switching to feedparser if it gives up
+
+    The lxml engine can give up partway through a document; feedparser then
+    parses the body and continues after the entries already yielded.
+    """
+    from lib.fast_feed_parser import iter_entries_fast, UnsupportedFeed
+
+    yielded = 0
+    try:
+        for entry in iter_entries_fast(body, include_raw=include_raw):
+            yield entry
+            yielded += 1
+        return
+    except UnsupportedFeed as e:
+        logger.info(f"lxml engine does not handle {feed_url} ({str(e)[:100]}), using feedparser")
+
+    feed = _parse_body(body)
+    for entry in feed.entries[yielded:]:
+        yield _parse_entry(entry, include_raw=include_raw)
+
+def _iter_entries(raw_entries: Iterable[Any], cutoff_date: Optional[datetime], stop_after_old: int,
+                  date_of: Callable[[Any], Optional[datetime]],
+                  build: Callable[[Any], FeedEntry]) -> Iterator[FeedEntry]:
+    """Yield parsed entries inside the cutoff window, stopping early on sorted feeds"""
+    previous_date = None
+    newest_first = True
+    consecutive_old = 0
+
+    for entry in raw_entries:
+        published_at = date_of(entry)
+
+        if cutoff_date is not None and published_at is not None:
+            if previous_date is not None and published_at > previous_date:
+                newest_first = False
+            previous_date = published_at
+
+            if published_at < cutoff_date:
+                consecutive_old += 1
+                if newest_first and consecutive_old >= stop_after_old:
+                    return
+                continue
+
+        consecutive_old = 0
+        yield build(entry)
+
+def _fetch_body(feed_url: str, timeout: int, cache, response_cache=None) -> Any:
+    """Download a feed body (conditionally, if cached), or replay it offline"""
+    if response_cache is not None and response_cache.offline:
+        cached = response_cache.get(feed_url)
+        if cached is None:
+            raise ValueError(f"Feed not in offline cache: {feed_url}")
+        return cached['body']
+
     # Fetch feed with timeout and User-Agent header
     headers = {
         'User-Agent': 'Weekly-Systems-Thinking-Brief/1.0 (Educational RSS reader; +https://github.com)'
     }
+    if cache is not None:
+        headers.update(cache.get_conditional_headers(feed_url))
+
     response = requests.get(feed_url, headers=headers, timeout=timeout)
+
+    if response.status_code == 304:
+        raise FeedNotModified(feed_url)
+
     response.raise_for_status()
 
-    # Parse feed
-    feed = feedparser.parse(response.content)
+    if cache is not None:
+        # Servers without validator support still get skipped when the body is identical
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        if cache.body_unchanged(feed_url, body_hash):
+            raise FeedNotModified(feed_url)
+
+        cache.stage(
+            feed_url,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            body_hash=body_hash
+        )
+
+    if response_cache is not None:
+        try:
+            # Raw bytes, so a replay parses exactly what was downloaded (and the lxml engine can run)
+            response_cache.put(feed_url, response.content, status_code=response.status_code,
+                               final_url=response.url,
+                               content_type=response.headers.get('Content-Type'))
+        except OSError as e:
+            logger.warning(f"Could not cache feed {feed_url}: {str(e)}")
+
+    return response.content
+
+def _parse_body(body: Any) -> Any:
+    """Run a feed body through feedparser, rejecting malformed feeds"""
+    feed = feedparser.parse(body)
 
     if feed.bozo:  # feedparser error indicator
         if hasattr(feed, 'bozo_exception'):
             raise ValueError(f"Malformed feed: {feed.bozo_exception}")
 
-    entries = []
-    for entry in feed.entries:
-        entries.append(_parse_entry(entry))
+    return feed
 
-    return entries
+def _entry_date(entry: Dict[str, Any]) -> Optional[datetime]:
+    """Extract published (or updated) date from a feedparser entry"""
+    if hasattr(entry, 'published_parsed') and entry.published_parsed:
+        try:
+            return datetime(*entry.published_parsed[:6])
+        except (TypeError, ValueError):
+            return None
+    elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+        try:
+            return datetime(*entry.updated_parsed[:6])
+        except (TypeError, ValueError):
+            return None
+    return None
 
-def _parse_entry(entry: Dict[str, Any]) -> FeedEntry:
+def _parse_entry(entry: Dict[str, Any], include_raw: bool = True) -> FeedEntry:
     """Parse single feed entry"""
     # Extract content (try multiple fields)
     content = ""
@@ -73,17 +233,7 @@ def _parse_entry(entry: Dict[str, Any]) -> FeedEntry:
         summary = entry.description
 
     # Extract published date
-    published_at = None
-    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-        try:
-            published_at = datetime(*entry.published_parsed[:6])
-        except (TypeError, ValueError):
-            pass
-    elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-        try:
-            published_at = datetime(*entry.updated_parsed[:6])
-        except (TypeError, ValueError):
-            pass
+    published_at = _entry_date(entry)
 
     # Extract author
     author = None
@@ -99,5 +249,5 @@ def _parse_entry(entry: Dict[str, Any]) -> FeedEntry:
         published_at=published_at,
         content=content,
         summary=summary,
-        raw_entry=entry
+        raw_entry=entry if include_raw else None
     )
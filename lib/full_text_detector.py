@@ -0,0 +1,68 @@
+"""
+Detect feeds that already embed full article text
+"""
+
+from typing import List, Optional
+from statistics import median
+
+from lib.text_cleaner import clean_html, calculate_word_count, process_html
+
+MAX_SAMPLES = 5
+MIN_SAMPLES = 3
+FULL_TEXT_COVERAGE = 0.6
+MIN_FEED_WORDS = 150
+
+def content_coverage(feed_content: str, page_html: str) -> Optional[float]:
+    """
+    Estimate how much of a fetched article a feed entry already contains
+
+    Both sides are cleaned the same way the extraction stage cleans them,
+    and only the page's main content is counted, so comment threads,
+    sidebars and related-post blocks don't dilute the ratio. Coverage is
+    the feed's word count relative to the page's: full-text feeds land
+    near 1.0, excerpt feeds near 0.
+
+    Args:
+        feed_content: Entry content from the feed (HTML)
+        page_html: Fetched article HTML
+
+    Returns:
+        Coverage ratio capped at 1.0, or None if the page has no usable text
+    """
+    feed_words = calculate_word_count(clean_html(feed_content)) if feed_content else 0
+    if feed_words < MIN_FEED_WORDS:
+        # Excerpt - no need to parse the page
+        return 0.0
+
+    page_words = process_html(page_html, main_content=True).word_count
+    if page_words == 0:
+        return None
+
+    return min(1.0, feed_words / page_words)
+
+def record_coverage(samples: List[float], coverage: float) -> List[float]:
+    """
+    Add a coverage sample, keeping the MAX_SAMPLES most recent
+
+    Args:
+        samples: Previous samples, newest first
+        coverage: New sample
+
+    Returns:
+        Updated samples, newest first
+    """
+    return ([round(coverage, 3)] + list(samples))[:MAX_SAMPLES]
+
+def is_full_text_feed(samples: List[float]) -> Optional[bool]:
+    """
+    Decide whether a source's feed carries complete articles
+
+    Args:
+        samples: Recent coverage samples, newest first
+
+    Returns:
+        True/False once MIN_SAMPLES are available, otherwise None (undecided)
+    """
+    if len(samples) < MIN_SAMPLES:
+        return None
+    return median(samples) >= FULL_TEXT_COVERAGE
@@ -0,0 +1,122 @@
+"""
+Checkpointing for resumable ingest runs
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+
+DEFAULT_CHECKPOINT_PATH = Path(__file__).parent.parent / ".cache" / "ingest_checkpoint.json"
+
+
+class IngestCheckpoint:
+    """
+    Record of which sources an interrupted ingest run already finished
+
+    The checkpoint is written after every source so that a run killed by a
+    job timeout can be resumed. It only applies to a later run with the same
+    settings (signature) and is ignored once older than max_age.
+
+    Progress is recorded per source, not per entry: a source cut off by the
+    deadline is marked partial and processed first on resume, and the
+    entries it already stored are skipped by the documents URL lookup like
+    any other known URL.
+    """
+
+    def __init__(self, signature: Dict[str, Any], path: Optional[Path] = None,
+                 max_age: timedelta = timedelta(hours=24)):
+        """
+        Initialize the checkpoint, loading a matching previous one if present
+
+        Args:
+            signature: Run settings that must match for a checkpoint to be resumed
+            path: JSON file location (default: .cache/ingest_checkpoint.json)
+            max_age: Ignore checkpoints older than this, so a scheduled run never
+                     skips sources on the strength of a previous week's progress
+        """
+        self.path = Path(path) if path else DEFAULT_CHECKPOINT_PATH
+        self.signature = signature
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.started_at = datetime.now().isoformat()
+        self.completed_sources: set = set()
+        self.partial_sources: set = set()
+        self.resumed = False
+
+        self._load(max_age)
+
+    def _load(self, max_age: timedelta) -> None:
+        """Adopt a previous checkpoint if it matches this run"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+            return
+
+        if data.get('signature') != self.signature:
+            self.logger.info("Ignoring checkpoint from a run with different settings")
+            return
+
+        started_at = datetime.fromisoformat(data.get('started_at', '1970-01-01T00:00:00'))
+        if datetime.now() - started_at > max_age:
+            self.logger.info("Ignoring stale checkpoint")
+            return
+
+        self.started_at = data['started_at']
+        self.completed_sources = set(data.get('completed_sources', []))
+        self.partial_sources = set(data.get('partial_sources', []))
+        self.resumed = True
+
+    def is_completed(self, source_id: str) -> bool:
+        """Whether a source was fully processed by the checkpointed run"""
+        return source_id in self.completed_sources
+
+    def is_partial(self, source_id: str) -> bool:
+        """Whether a source was interrupted part-way by the checkpointed run"""
+        return source_id in self.partial_sources
+
+    def mark_completed(self, source_id: str) -> None:
+        """Record a fully processed source and persist the checkpoint"""
+        with self._lock:
+            self.completed_sources.add(source_id)
+            self.partial_sources.discard(source_id)
+        self.save()
+
+    def mark_partial(self, source_id: str) -> None:
+        """Record a source interrupted by the deadline and persist the checkpoint"""
+        with self._lock:
+            self.partial_sources.add(source_id)
+        self.save()
+
+    def save(self) -> None:
+        """Write the checkpoint to disk"""
+        with self._lock:
+            data = {
+                "signature": self.signature,
+                "started_at": self.started_at,
+                "completed_sources": sorted(self.completed_sources),
+                "partial_sources": sorted(self.partial_sources)
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix('.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f, indent=2)
+                tmp_path.replace(self.path)
+            except OSError as e:
+                self.logger.warning(f"Could not write checkpoint: {str(e)}")
+
+    def clear(self) -> None:
+        """Remove the checkpoint after a run that finished every source"""
+        with self._lock:
+            self.completed_sources.clear()
+            self.partial_sources.clear()
+            self.path.unlink(missing_ok=True)
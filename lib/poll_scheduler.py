@@ -0,0 +1,62 @@
+"""
+Adaptive per-source polling schedule
+"""
+
+from typing import List, Optional
+from datetime import datetime, timedelta
+from statistics import median
+
+MIN_POLL_INTERVAL = timedelta(hours=1)
+MAX_POLL_INTERVAL = timedelta(days=14)
+BACKOFF_FACTOR = 1.5
+
+def estimate_publish_interval(published_dates: List[Optional[datetime]],
+                              max_samples: int = 10) -> Optional[timedelta]:
+    """
+    Estimate how often a source publishes from its recent history
+
+    Args:
+        published_dates: Publish dates of the source's documents (any order, None ignored)
+        max_samples: Number of most recent dates to consider
+
+    Returns:
+        Median gap between consecutive publishes, or None with fewer than 2 dates
+    """
+    dates = sorted((d for d in published_dates if d is not None), reverse=True)[:max_samples]
+    if len(dates) < 2:
+        return None
+
+    gaps = [(dates[i] - dates[i + 1]).total_seconds() for i in range(len(dates) - 1)]
+    return timedelta(seconds=median(gaps))
+
+def compute_poll_interval(publish_interval: Optional[timedelta],
+                          previous_interval: Optional[timedelta],
+                          found_new: bool,
+                          min_interval: timedelta = MIN_POLL_INTERVAL,
+                          max_interval: timedelta = MAX_POLL_INTERVAL) -> timedelta:
+    """
+    Decide how long to wait before polling a source again
+
+    Polls at half the observed publishing cadence. A poll that finds new
+    entries resets to that cadence; an empty poll (304 or nothing new) backs
+    off multiplicatively from the previous interval.
+
+    Args:
+        publish_interval: Estimated gap between publishes (None if unknown)
+        previous_interval: Interval used before this poll (None if never scheduled)
+        found_new: Whether this poll found new entries
+        min_interval: Lower bound on the interval
+        max_interval: Upper bound on the interval
+
+    Returns:
+        Interval until the next poll
+    """
+    cadence = publish_interval / 2 if publish_interval else min_interval
+    cadence = max(min_interval, min(max_interval, cadence))
+
+    if found_new or previous_interval is None:
+        interval = cadence
+    else:
+        interval = max(cadence, previous_interval * BACKOFF_FACTOR)
+
+    return max(min_interval, min(max_interval, interval))
@@ -0,0 +1,187 @@
+"""
+Content-addressed on-disk cache of fetched article responses
+"""
+
+import os
+import json
+import base64
+import gzip
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache" / "http"
+
+
+def normalize_cache_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key
+
+    Lowercases scheme and host, drops the fragment and default ports,
+    and sorts query parameters.
+
+    Args:
+        url: URL to normalize
+
+    Returns:
+        Normalized URL string
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+class ResponseCache:
+    """
+    Gzip-compressed response store keyed by normalized URL
+
+    Entries expire after ttl_seconds. When the store grows past max_bytes,
+    least recently used entries (by file mtime, refreshed on every hit) are
+    evicted down to 90% of the budget. In offline mode the fetcher serves only from this cache.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl_seconds: Optional[int] = 30 * 24 * 3600,
+                 max_bytes: int = 500 * 1024 * 1024, offline: bool = False):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory for cached responses (default: .cache/http)
+            ttl_seconds: Entry lifetime in seconds (None = never expire)
+            max_bytes: Maximum total size of cached files before LRU eviction
+            offline: If True, callers must not touch the network on a miss
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Running size estimate so the directory is only rescanned when over budget
+        self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob('*/*.json.gz'))
+
+    def _path_for(self, url: str) -> Path:
+        key = hashlib.sha256(normalize_cache_url(url).encode('utf-8')).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response
+
+        Args:
+            url: Requested URL
+
+        Returns:
+            Dict with url, final_url, status_code, content_type, headers, body
+            (str, or bytes if stored as bytes) and stored_at, or None on
+            miss / expiry / corrupt entry
+        """
+        path = self._path_for(url)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Dropping unreadable cache entry for {url}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # Offline replay serves whatever is on disk, however old
+        if not self.offline and self.ttl_seconds is not None:
+            if time.time() - entry.get('stored_at', 0) > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                return None
+
+        # Touch for LRU ordering
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        if entry.get('body_encoding') == 'base64':
+            entry['body'] = base64.b64decode(entry['body'])
+        return entry
+
+    def put(self, url: str, body: Union[str, bytes], status_code: Optional[int] = None,
+            final_url: Optional[str] = None, content_type: Optional[str] = None,
+            headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        Store a response
+
+        Args:
+            url: Requested URL
+            body: Decoded response body, or raw bytes (kept byte-for-byte, e.g.
+                  feeds whose parser honours the XML encoding declaration)
+            status_code: HTTP status code
+            final_url: URL after redirects
+            content_type: Content-Type header
+            headers: Selected response headers to keep
+        """
+        path = self._path_for(url)
+        entry = {
+            "url": url,
+            "final_url": final_url,
+            "status_code": status_code,
+            "content_type": content_type,
+            "headers": headers or {},
+            "body": body,
+            "stored_at": time.time()
+        }
+        if isinstance(body, bytes):
+            entry["body"] = base64.b64encode(body).decode('ascii')
+            entry["body_encoding"] = "base64"
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f)
+        try:
+            # Overwriting an entry frees its old size
+            old_size = path.stat().st_size
+        except FileNotFoundError:
+            old_size = 0
+        tmp_path.replace(path)
+
+        with self._lock:
+            self._total_bytes += path.stat().st_size - old_size
+            over_budget = self._total_bytes > self.max_bytes
+
+        if over_budget:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the store is back under budget"""
+        with self._lock:
+            files = []
+            total = 0
+            for path in self.cache_dir.glob('*/*.json.gz'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            # Evict below the limit so the next few puts don't each trigger a rescan
+            target = int(self.max_bytes * 0.9)
+            if total > self.max_bytes:
+                files.sort()
+                for _, size, path in files:
+                    path.unlink(missing_ok=True)
+                    total -= size
+                    if total <= target:
+                        break
+
+            self._total_bytes = total
@@ -0,0 +1,79 @@
+"""
+Streaming, keyset-paginated reads of Supabase tables and views
+"""
+
+from typing import Any, Callable, Dict, Iterator, Optional
+
+DEFAULT_PAGE_SIZE = 100
+
+# Applies filters to a fresh query builder and returns it
+QueryFilter = Callable[[Any], Any]
+
+def iter_rows(supabase, table: str, columns: str = '*', key: str = 'id',
+              page_size: int = DEFAULT_PAGE_SIZE, filters: Optional[QueryFilter] = None,
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the rows of a table or view, one page at a time
+
+    Pages are ordered by key and continue after the last key seen (keyset)
+    rather than by offset, so each request is an index range scan, and rows
+    that stop matching the filters while the caller works through them
+    (e.g. once processed) don't shift later pages. At most one page is
+    held in memory.
+
+    Args:
+        supabase: Supabase client
+        table: Table or view name
+        columns: Column projection passed to select()
+        key: Unique, non-null column to order and page by (must be in columns)
+        page_size: Rows fetched per request
+        filters: Function applying filters to the query, e.g.
+                 lambda q: q.is_('embedding', 'null')
+        limit: Stop after this many rows
+
+    Yields:
+        Row dicts, in key order
+    """
+    page_size = max(1, page_size)
+    last_key = None
+    yielded = 0
+
+    while True:
+        size = page_size if not limit else min(page_size, limit - yielded)
+        if size <= 0:
+            return
+
+        query = supabase.table(table).select(columns)
+        if filters:
+            query = filters(query)
+        query = query.order(key).limit(size)
+        if last_key is not None:
+            query = query.gt(key, last_key)
+
+        rows = query.execute().data or []
+        for row in rows:
+            yield row
+        yielded += len(rows)
+
+        if len(rows) < size:
+            return
+        last_key = rows[-1][key]
+
+def count_rows(supabase, table: str, filters: Optional[QueryFilter] = None,
+               key: str = 'id') -> Optional[int]:
+    """
+    Count the rows of a table or view without fetching them
+
+    Args:
+        supabase: Supabase client
+        table: Table or view name
+        filters: Function applying filters to the query (as for iter_rows)
+        key: Any column, selected for the single row returned
+
+    Returns:
+        Exact row count, or None if the server did not report one
+    """
+    query = supabase.table(table).select(key, count='exact')
+    if filters:
+        query = filters(query)
+    return query.limit(1).execute().count
@@ -4,7 +4,67 @@ Text cleaning utilities for extracting plain text from HTML
 
 from bs4 import BeautifulSoup
 import re
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional
+
+from lib.content_templates import select_main_content
+
+# Bump whenever a change alters cleaned text, word counts or reading times;
+# stored on extractions so --reprocess only redoes outdated rows
+# v2: main-content detection (learned templates / density scoring)
+CLEANER_VERSION = "v2"
+
+@dataclass
+class ProcessedHTML:
+    """Everything the extraction stage needs from one HTML document"""
+    cleaned_text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    word_count: int = 0
+    reading_time_minutes: int = 1
+    content_path: Optional[str] = None  # DOM path of the main content element, if found
+    template_hit: bool = False  # Whether a learned template located the main content
+
+def process_html(html_content: str, words_per_minute: int = 200, main_content: bool = False,
+                 template_path: Optional[str] = None) -> ProcessedHTML:
+    """
+    Clean HTML and extract metadata from a single parse
+
+    Equivalent to calling clean_html, extract_metadata, calculate_word_count
+    and calculate_reading_time separately, but the document is parsed once
+    and the text split into words once. With main_content, only the text of
+    the page's main content element is kept (see lib/content_templates).
+
+    Args:
+        html_content: Raw HTML string
+        words_per_minute: Reading speed used for reading time
+        main_content: If True, drop text outside the detected main content
+        template_path: Learned main-content selector for the page's domain
+
+    Returns:
+        ProcessedHTML with cleaned text, metadata, word count and reading time
+    """
+    soup = BeautifulSoup(html_content, 'lxml')
+
+    # Metadata first - cleaning removes elements from the tree
+    metadata = _metadata_from_soup(soup)
+
+    root, content_path, template_hit = soup, None, False
+    if main_content:
+        node, content_path, template_hit = select_main_content(soup, template_path)
+        if node is not None:
+            root = node
+
+    cleaned_text = _text_from_soup(root)
+
+    word_count = len(cleaned_text.split())
+    return ProcessedHTML(
+        cleaned_text=cleaned_text,
+        metadata=metadata,
+        word_count=word_count,
+        reading_time_minutes=max(1, round(word_count / words_per_minute)),
+        content_path=content_path,
+        template_hit=template_hit
+    )
 
 def clean_html(html_content: str) -> str:
     """
@@ -22,9 +82,10 @@ def clean_html(html_content: str) -> str:
         - Excessive whitespace
         - Navigation, ads, comments
     """
-    # Parse HTML
-    soup = BeautifulSoup(html_content, 'lxml')
+    return _text_from_soup(BeautifulSoup(html_content, 'lxml'))
 
+def _text_from_soup(soup: BeautifulSoup) -> str:
+    """Strip unwanted elements from a parsed document and return its normalized text"""
     # Remove unwanted elements
     for element in soup(['script', 'style', 'nav', 'footer', 'header',
                          'iframe', 'noscript', 'aside']):
@@ -104,7 +165,10 @@ def extract_metadata(html_content: str) -> Dict[str, Any]:
     Returns:
         Dictionary of metadata
     """
-    soup = BeautifulSoup(html_content, 'lxml')
+    return _metadata_from_soup(BeautifulSoup(html_content, 'lxml'))
+
+def _metadata_from_soup(soup: BeautifulSoup) -> Dict[str, Any]:
+    """Read title, description, keywords and Open Graph tags from a parsed document"""
     metadata = {}
 
     # Extract title
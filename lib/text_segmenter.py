@@ -3,70 +3,120 @@ Text segmentation utilities for breaking content into logical sections
 """
 
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
+
+# Bump whenever a change alters the sections produced from the same text;
+# extractions with an older version are re-segmented without re-cleaning
+# v2: sections hold start/end offsets into the text instead of copied content
+SEGMENTER_VERSION = "v2"
 
 def segment_text(text: str, min_section_length: int = 100) -> List[Dict[str, Any]]:
     """
     Segment text into logical sections
 
+    Sections reference the text by character offsets rather than copying it,
+    so storing them next to the text adds almost nothing. Use section_text()
+    or iter_sections() to read their content.
+
     Args:
         text: Clean text content
         min_section_length: Minimum characters for a section (default: 100)
 
     Returns:
-        List of section dictionaries with 'heading' and 'content'
+        List of section dictionaries with 'heading', 'start' and 'end'
+        (content is text[start:end])
 
     Strategy:
         - Detect headings (lines ending with colon, all caps, etc.)
         - Split on double newlines for paragraphs
         - Group paragraphs into logical sections
     """
+    whole_text = [{'heading': None, 'start': 0, 'end': len(text)}]
     sections = []
 
-    # Split by double newlines (paragraphs)
-    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    # Split by double newlines (paragraphs), keeping each paragraph's span
+    paragraphs = _paragraph_spans(text)
 
     if not paragraphs:
-        return [{'heading': None, 'content': text}]
+        return whole_text
 
-    current_section = {'heading': None, 'content': []}
+    heading = None
+    first = last = None
 
-    for para in paragraphs:
+    for start, end in paragraphs:
         # Check if this looks like a heading
-        if _is_heading(para):
+        if _is_heading(text[start:end]):
             # Save previous section if it has content
-            if current_section['content']:
-                sections.append({
-                    'heading': current_section['heading'],
-                    'content': '\n\n'.join(current_section['content'])
-                })
+            if first is not None:
+                sections.append({'heading': heading, 'start': first[0], 'end': last[1]})
 
             # Start new section
-            current_section = {'heading': para, 'content': []}
+            heading = text[start:end]
+            first = last = None
         else:
             # Add to current section
-            current_section['content'].append(para)
+            if first is None:
+                first = (start, end)
+            last = (start, end)
 
     # Add final section
-    if current_section['content']:
-        sections.append({
-            'heading': current_section['heading'],
-            'content': '\n\n'.join(current_section['content'])
-        })
+    if first is not None:
+        sections.append({'heading': heading, 'start': first[0], 'end': last[1]})
 
     # If no sections detected, return whole text as one section
     if not sections:
-        return [{'heading': None, 'content': text}]
+        return whole_text
 
     # Filter out sections that are too short
-    sections = [s for s in sections if len(s['content']) >= min_section_length]
+    sections = [s for s in sections if s['end'] - s['start'] >= min_section_length]
 
     # If filtering removed everything, return original text
     if not sections:
-        return [{'heading': None, 'content': text}]
+        return whole_text
 
     return sections
 
+def _paragraph_spans(text: str) -> List[Tuple[int, int]]:
+    """Return (start, end) offsets of the non-blank, whitespace-trimmed paragraphs of text"""
+    spans = []
+    pos = 0
+    for chunk in text.split('\n\n'):
+        stripped = chunk.strip()
+        if stripped:
+            start = pos + (len(chunk) - len(chunk.lstrip()))
+            spans.append((start, start + len(stripped)))
+        pos += len(chunk) + 2
+    return spans
+
+def section_text(text: str, section: Dict[str, Any]) -> str:
+    """
+    Return the content of a section
+
+    Args:
+        text: The text the sections were produced from (extractions.cleaned_text)
+        section: Section dict, offset-based or legacy with 'content'
+
+    Returns:
+        Section content
+    """
+    if 'content' in section:
+        return section['content']
+    return text[section['start']:section['end']]
+
+def iter_sections(text: str, sections: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield sections with their content, slicing each only when reached
+
+    Args:
+        text: The text the sections were produced from (extractions.cleaned_text)
+        sections: Stored sections, offset-based or legacy
+
+    Yields:
+        Dicts with 'heading' and 'content'
+    """
+    for section in sections or []:
+        yield {'heading': section.get('heading'), 'content': section_text(text, section)}
+
 def _is_heading(text: str) -> bool:
     """
     Determine if text looks like a heading
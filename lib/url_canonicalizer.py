@@ -0,0 +1,84 @@
+"""
+Canonical URLs for cross-feed document deduplication
+"""
+
+from typing import Dict, Optional, Set
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the click and never change the article.
+# Generic names (ref, share, ...) can be meaningful on other sites, so they
+# are only listed per host in HOST_TRACKING_PARAMS
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'yclid', 'twclid',
+    'mc_cid', 'mc_eid', 'mkt_tok', '_hsenc', '_hsmi', 'hsctatracking',
+    'oly_anon_id', 'oly_enc_id', 'vero_id', 'wt.mc_id',
+    'pk_campaign', 'pk_kwd', 'pk_source', 'pk_medium', 'pk_content',
+    'mtm_campaign', 'mtm_kwd', 'mtm_source', 'mtm_medium', 'mtm_content',
+    'mtm_cid', 'mtm_group', 'mtm_placement'
+}
+TRACKING_PREFIXES = ('utm_',)
+
+# Tracking parameters with generic names, keyed by canonical host
+HOST_TRACKING_PARAMS: Dict[str, Set[str]] = {
+    'nytimes.com': {'smid'},
+}
+
+# Host prefixes that serve the same site
+MIRROR_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+
+# Additional mirrored domains, mapped to the domain they mirror
+DOMAIN_ALIASES: Dict[str, str] = {}
+
+def canonicalize_url(url: str, domain_aliases: Optional[Dict[str, str]] = None) -> str:
+    """
+    Reduce a URL to a canonical form shared by its trivial variants
+
+    http/https, www./m./amp. host prefixes, default ports, fragments,
+    known tracking parameters, parameter order and trailing slashes are all
+    normalized away. Path case is preserved since paths can be case
+    sensitive.
+
+    Args:
+        url: Article URL
+        domain_aliases: Mirror domain -> primary domain map (default: DOMAIN_ALIASES)
+
+    Returns:
+        Canonical URL string (the input stripped of whitespace if it can't be parsed)
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    host = (parts.hostname or '').rstrip('.')
+    for prefix in MIRROR_PREFIXES:
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    aliases = DOMAIN_ALIASES if domain_aliases is None else domain_aliases
+    host = aliases.get(host, host)
+
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+
+    path = parts.path or '/'
+    while '//' in path:
+        path = path.replace('//', '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    host_params = HOST_TRACKING_PARAMS.get(host, set())
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and key.lower() not in host_params
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urlencode(sorted(params))
+
+    return urlunsplit(('https', netloc, path, query, ''))
@@ -3,19 +3,24 @@ URL Fetcher - Fetch full article HTML from URLs with retry logic and fallback
 """
 
 import requests
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
+    retry_if_exception,
     retry_if_exception_type,
     retry_if_result
 )
 from urllib.parse import urlparse
 import time
+import re
 
 
 @dataclass
@@ -30,10 +35,41 @@ class FetchResult:
     fetch_duration_ms: int = 0
 
 
+class ResponseTooLarge(Exception):
+    """Raised when a response body exceeds the configured size limit"""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"Response too large ({size:,} bytes > {limit:,} byte limit)")
+        self.size = size
+        self.limit = limit
+
+
+# Statuses that mean the server is struggling rather than the URL being bad
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _is_transient_error(exception: BaseException) -> bool:
+    """Whether a fetch error is worth retrying: network failures and retryable HTTP statuses"""
+    if isinstance(exception, requests.exceptions.HTTPError):
+        response = exception.response
+        return response is not None and response.status_code in RETRYABLE_STATUSES
+    return isinstance(exception, (
+        requests.exceptions.Timeout,
+        requests.exceptions.ConnectionError,
+        requests.exceptions.ChunkedEncodingError
+    ))
+
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_\-]+)', re.IGNORECASE)
+
+
 class ArticleFetcher:
     """Fetch full article HTML from URLs with retry logic and rate limiting"""
 
-    def __init__(self, timeout: int = 15, max_retries: int = 3, rate_limit_delay: float = 1.0):
+    def __init__(self, timeout: int = 15, max_retries: int = 3, rate_limit_delay: float = 1.0,
+                 max_workers: int = 8, pool_size: int = 10, response_cache=None,
+                 max_body_bytes: int = 5 * 1024 * 1024, charset_sniff_bytes: int = 64 * 1024,
+                 circuit_breaker=None):
         """
         Initialize the ArticleFetcher
 
@@ -41,18 +77,76 @@ class ArticleFetcher:
             timeout: HTTP request timeout in seconds
             max_retries: Maximum number of retry attempts
             rate_limit_delay: Delay between requests to same domain (seconds)
+            max_workers: Number of domains fetched in parallel by fetch_many()
+            pool_size: Keep-alive connections kept per host
+            response_cache: Optional ResponseCache consulted before the network
+            max_body_bytes: Abort downloads whose decoded body exceeds this size
+            charset_sniff_bytes: Bytes inspected when the charset must be guessed
+            circuit_breaker: Optional DomainCircuitBreaker; URLs on domains with an
+                             open circuit get their fallback content without a request
         """
         self.timeout = timeout
         self.max_retries = max_retries
         self.rate_limit_delay = rate_limit_delay
+        self.max_workers = max(1, max_workers)
+        self.pool_size = pool_size
+        self.response_cache = response_cache
+        self.max_body_bytes = max_body_bytes
+        self.charset_sniff_bytes = charset_sniff_bytes
+        self.circuit_breaker = circuit_breaker
         self.logger = logging.getLogger(__name__)
 
-        # Track last request time per domain for rate limiting
-        self.domain_last_request: Dict[str, datetime] = {}
+        # Earliest time (time.monotonic) the next request to each domain may start
+        self.domain_next_slot: Dict[str, float] = {}
+        self._rate_lock = threading.Lock()
+
+        # One pooled session per thread - requests.Session is not thread-safe.
+        # All sessions are tracked so close() can release their connections.
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._pool_lock = threading.Lock()
+
+        # Long-lived pool for fetch_many, so its threads (and their keep-alive
+        # sessions) are reused across calls instead of rebuilt for every batch
+        self._executor: Optional[ThreadPoolExecutor] = None
 
         # User-Agent header
         self.user_agent = 'Weekly-AI-Brief/1.0 (Educational; +https://github.com)'
 
+    def _get_session(self) -> requests.Session:
+        """Return this thread's pooled keep-alive session"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+            with self._pool_lock:
+                self._sessions.append(session)
+        return session
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the fetch_many thread pool, starting it on first use"""
+        with self._pool_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='article-fetch')
+            return self._executor
+
+    def close(self) -> None:
+        """Stop the fetch_many thread pool and close every pooled session"""
+        with self._pool_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        with self._pool_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL"""
         try:
@@ -62,19 +156,23 @@ class ArticleFetcher:
             return "unknown"
 
     def _apply_rate_limit(self, url: str) -> None:
-        """Apply per-domain rate limiting"""
-        domain = self._get_domain(url)
+        """
+        Apply per-domain rate limiting
 
-        if domain in self.domain_last_request:
-            last_request = self.domain_last_request[domain]
-            elapsed = (datetime.now() - last_request).total_seconds()
+        Reserves the next free slot for the URL's domain and waits only for
+        that slot, so requests to other domains are never held up.
+        """
+        domain = self._get_domain(url)
 
-            if elapsed < self.rate_limit_delay:
-                sleep_time = self.rate_limit_delay - elapsed
-                self.logger.debug(f"Rate limiting {domain}: sleeping {sleep_time:.2f}s")
-                time.sleep(sleep_time)
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self.domain_next_slot.get(domain, now))
+            self.domain_next_slot[domain] = slot + self.rate_limit_delay
 
-        self.domain_last_request[domain] = datetime.now()
+        sleep_time = slot - now
+        if sleep_time > 0:
+            self.logger.debug(f"Rate limiting {domain}: sleeping {sleep_time:.2f}s")
+            time.sleep(sleep_time)
 
     def _is_retryable_exception(self, exception: Exception) -> bool:
         """Determine if an exception is retryable"""
@@ -88,7 +186,7 @@ class ArticleFetcher:
     def _is_retryable_status(self, status_code: int) -> bool:
         """Determine if a status code is retryable"""
         # Retry on: 429 (rate limit), 500, 502, 503, 504 (server errors)
-        return status_code in (429, 500, 502, 503, 504)
+        return status_code in RETRYABLE_STATUSES
 
     def _is_valid_content_type(self, content_type: Optional[str]) -> bool:
         """Check if content type is valid for article extraction"""
@@ -102,25 +200,27 @@ class ArticleFetcher:
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=4),
-        retry=retry_if_exception_type((
-            requests.exceptions.Timeout,
-            requests.exceptions.ConnectionError,
-            requests.exceptions.ChunkedEncodingError
-        )),
+        retry=retry_if_exception(_is_transient_error),
         reraise=True
     )
-    def _fetch_with_retry(self, url: str) -> requests.Response:
+    def _fetch_with_retry(self, url: str) -> Tuple[requests.Response, Optional[bytes]]:
         """
-        Fetch URL with retry logic for network errors
+        Fetch URL with retry logic for network errors and retryable statuses
+
+        The body is streamed and only read when the status and content type
+        are acceptable; it is read incrementally (decompressing as it goes)
+        and abandoned as soon as it exceeds max_body_bytes.
 
         Args:
             url: URL to fetch
 
         Returns:
-            requests.Response object
+            (requests.Response, body bytes) - body is None when not downloaded
+            because of an error status or unsupported content type
 
         Raises:
             requests.exceptions.RequestException: On final failure
+            ResponseTooLarge: Body exceeds max_body_bytes
         """
         headers = {
             'User-Agent': self.user_agent,
@@ -130,21 +230,86 @@ class ArticleFetcher:
             'Connection': 'keep-alive',
         }
 
-        response = requests.get(
+        response = self._get_session().get(
             url,
             headers=headers,
             timeout=self.timeout,
-            allow_redirects=True
+            allow_redirects=True,
+            stream=True
         )
 
         # Handle HTTP errors - some are retryable
         if self._is_retryable_status(response.status_code):
+            response.close()
             response.raise_for_status()  # Raises HTTPError
 
-        # Non-retryable HTTP errors (4xx except 429) - return as-is
-        # We'll handle them in fetch_url()
+        # Non-retryable HTTP errors (4xx except 429) and unusable content
+        # types are returned without downloading the body
+        content_type = response.headers.get('content-type', '').lower()
+        if response.status_code >= 400 or not self._is_valid_content_type(content_type):
+            response.close()
+            return response, None
+
+        return response, self._read_limited(response)
+
+    def _read_limited(self, response: requests.Response) -> bytes:
+        """
+        Read a streamed response body, enforcing max_body_bytes
+
+        Args:
+            response: Streaming response
 
-        return response
+        Returns:
+            Decoded (decompressed) body bytes
+
+        Raises:
+            ResponseTooLarge: Declared or actual size exceeds the limit
+        """
+        declared = response.headers.get('content-length', '')
+        if declared.isdigit() and int(declared) > self.max_body_bytes:
+            response.close()
+            raise ResponseTooLarge(int(declared), self.max_body_bytes)
+
+        chunks = []
+        total = 0
+        # iter_content decompresses gzip/deflate incrementally, so the limit
+        # also bounds decompression bombs
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            total += len(chunk)
+            if total > self.max_body_bytes:
+                response.close()
+                raise ResponseTooLarge(total, self.max_body_bytes)
+            chunks.append(chunk)
+
+        return b''.join(chunks)
+
+    def _decode_body(self, response: requests.Response, body: bytes) -> str:
+        """
+        Decode a body using a bounded charset detection strategy
+
+        Order: charset in Content-Type, <meta charset> in the first few KB,
+        statistical detection on the first charset_sniff_bytes, then UTF-8.
+        """
+        encoding = None
+        content_type = response.headers.get('content-type', '')
+        if 'charset=' in content_type.lower():
+            encoding = response.encoding
+
+        if not encoding:
+            match = _META_CHARSET_RE.search(body[:4096])
+            if match:
+                encoding = match.group(1).decode('ascii')
+
+        if not encoding:
+            try:
+                encoding = requests.compat.chardet.detect(body[:self.charset_sniff_bytes])['encoding']
+            except Exception:
+                encoding = None
+
+        try:
+            return body.decode(encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return body.decode('utf-8', errors='replace')
 
     def fetch_url(self, url: str, fallback_content: str = "") -> FetchResult:
         """
@@ -159,12 +324,46 @@ class ArticleFetcher:
         """
         start_time = datetime.now()
 
+        if self.response_cache is not None:
+            cached = self.response_cache.get(url)
+            if cached is not None:
+                duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+                self.logger.debug(f"Cache hit for {url}")
+                return FetchResult(
+                    success=True,
+                    html=cached['body'],
+                    status_code=cached.get('status_code'),
+                    final_url=cached.get('final_url'),
+                    content_type=cached.get('content_type'),
+                    fetch_duration_ms=duration_ms
+                )
+
+            if self.response_cache.offline:
+                return FetchResult(
+                    success=False,
+                    html=fallback_content,
+                    error="Not in offline cache"
+                )
+
+        domain = self._get_domain(url)
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow(domain):
+            self.logger.debug(f"Circuit open for {domain}, using fallback for {url}")
+            return FetchResult(
+                success=False,
+                html=fallback_content,
+                error=f"Circuit open for {domain}"
+            )
+
         try:
             # Apply rate limiting
             self._apply_rate_limit(url)
 
             # Fetch with retry logic
-            response = self._fetch_with_retry(url)
+            response, body = self._fetch_with_retry(url)
+
+            # The server answered, so the domain is up even if this URL fails below
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success(domain)
 
             # Check status code
             if response.status_code >= 400:
@@ -199,8 +398,10 @@ class ArticleFetcher:
                     fetch_duration_ms=duration_ms
                 )
 
+            text = self._decode_body(response, body)
+
             # Check if content is too small (likely error page)
-            if len(response.text) < 100:
+            if len(text) < 100:
                 error_msg = "Content too small (likely error page)"
                 self.logger.warning(f"Failed to fetch {url}: {error_msg}")
 
@@ -217,21 +418,49 @@ class ArticleFetcher:
 
             # Success!
             duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-            self.logger.debug(f"Successfully fetched {url} ({len(response.text)} bytes in {duration_ms}ms)")
+            self.logger.debug(f"Successfully fetched {url} ({len(text)} bytes in {duration_ms}ms)")
+
+            if self.response_cache is not None:
+                try:
+                    self.response_cache.put(
+                        url,
+                        text,
+                        status_code=response.status_code,
+                        final_url=response.url,
+                        content_type=content_type,
+                        headers={k: v for k, v in response.headers.items()
+                                 if k.lower() in ('etag', 'last-modified', 'content-type')}
+                    )
+                except OSError as e:
+                    self.logger.warning(f"Could not cache response for {url}: {str(e)}")
 
             return FetchResult(
                 success=True,
-                html=response.text,
+                html=text,
                 status_code=response.status_code,
                 final_url=response.url,
                 content_type=content_type,
                 fetch_duration_ms=duration_ms
             )
 
+        except ResponseTooLarge as e:
+            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            error_msg = str(e)
+            self.logger.warning(f"Failed to fetch {url}: {error_msg}")
+
+            return FetchResult(
+                success=False,
+                html=fallback_content,
+                error=error_msg,
+                fetch_duration_ms=duration_ms
+            )
+
         except requests.exceptions.Timeout as e:
             duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             error_msg = f"Request timeout after {self.timeout}s"
             self.logger.warning(f"Failed to fetch {url}: {error_msg}")
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure(domain, error_msg)
 
             return FetchResult(
                 success=False,
@@ -244,6 +473,8 @@ class ArticleFetcher:
             duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             error_msg = f"Connection error: {str(e)[:100]}"
             self.logger.warning(f"Failed to fetch {url}: {error_msg}")
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure(domain, error_msg)
 
             return FetchResult(
                 success=False,
@@ -256,6 +487,11 @@ class ArticleFetcher:
             duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             error_msg = f"Request error: {str(e)[:100]}"
             self.logger.warning(f"Failed to fetch {url}: {error_msg}")
+            # Only retryable statuses count against the domain - InvalidURL,
+            # TooManyRedirects, decoding errors etc. are problems of this one link
+            if (self.circuit_breaker is not None and isinstance(e, requests.exceptions.HTTPError)
+                    and _is_transient_error(e)):
+                self.circuit_breaker.record_failure(domain, error_msg)
 
             return FetchResult(
                 success=False,
@@ -275,3 +511,40 @@ class ArticleFetcher:
                 error=error_msg,
                 fetch_duration_ms=duration_ms
             )
+
+    def fetch_many(self, items: List[Tuple[str, str]]) -> List[FetchResult]:
+        """
+        Fetch many URLs, running different domains in parallel
+
+        URLs are grouped by domain. Each domain is worked through serially
+        (honouring rate_limit_delay) while up to max_workers domains are
+        fetched at once, on a pool shared by all calls (so concurrent callers
+        together stay within max_workers). With a circuit breaker, domains
+        with a history of failures are started last.
+
+        Args:
+            items: List of (url, fallback_content) pairs
+
+        Returns:
+            FetchResult for each item, in input order
+        """
+        results: List[Optional[FetchResult]] = [None] * len(items)
+
+        by_domain: Dict[str, List[int]] = {}
+        for index, (url, _) in enumerate(items):
+            by_domain.setdefault(self._get_domain(url), []).append(index)
+
+        def fetch_domain(indexes: List[int]) -> None:
+            for index in indexes:
+                url, fallback_content = items[index]
+                results[index] = self.fetch_url(url, fallback_content=fallback_content)
+
+        domains = list(by_domain)
+        if self.circuit_breaker is not None:
+            domains.sort(key=self.circuit_breaker.trips)
+
+        executor = self._get_executor()
+        for future in [executor.submit(fetch_domain, by_domain[domain]) for domain in domains]:
+            future.result()
+
+        return results
@@ -0,0 +1,28 @@
+-- Migration 006: Near-Duplicate Fingerprints
+-- Adds SimHash fingerprints and duplicate links to documents so ingest can
+-- skip cross-posted or re-rendered articles before extraction/analysis
+-- Depends on: 001_initial_schema.sql
+
+-- ============================================================================
+-- Columns
+-- ============================================================================
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_fingerprint BIGINT;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS duplicate_of UUID REFERENCES documents(id) ON DELETE SET NULL;
+
+COMMENT ON COLUMN documents.content_fingerprint IS '64-bit SimHash of normalized text (stored signed) for near-duplicate detection';
+COMMENT ON COLUMN documents.duplicate_of IS 'Original document this one near-duplicates; set rows are skipped downstream';
+
+-- ============================================================================
+-- Indexes
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_documents_duplicate_of ON documents(duplicate_of)
+    WHERE duplicate_of IS NOT NULL;
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 006_near_duplicate_fingerprints.sql completed successfully';
+    RAISE NOTICE 'Added documents.content_fingerprint and documents.duplicate_of';
+END $$;
@@ -0,0 +1,29 @@
+-- Migration 007: Adaptive Source Polling
+-- Stores a learned polling schedule per source so ingest can run often
+-- without re-polling quiet feeds every time
+-- Depends on: 001_initial_schema.sql
+
+-- ============================================================================
+-- Columns
+-- ============================================================================
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS last_polled_at TIMESTAMPTZ;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS next_poll_at TIMESTAMPTZ;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS poll_interval_minutes INTEGER;
+
+COMMENT ON COLUMN sources.last_polled_at IS 'When ingest last successfully polled this source';
+COMMENT ON COLUMN sources.next_poll_at IS 'Earliest time the adaptive scheduler will poll this source again (NULL = due now)';
+COMMENT ON COLUMN sources.poll_interval_minutes IS 'Current adaptive polling interval, learned from publishing cadence';
+
+-- ============================================================================
+-- Indexes
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_sources_next_poll_at ON sources(next_poll_at);
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 007_adaptive_polling.sql completed successfully';
+    RAISE NOTICE 'Added sources.last_polled_at, next_poll_at, poll_interval_minutes';
+END $$;
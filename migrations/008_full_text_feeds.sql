@@ -0,0 +1,22 @@
+-- Migration 008: Full-Text Feed Detection
+-- Remembers which sources already publish complete articles in their feed,
+-- so ingest can skip fetching those articles from the web
+-- Depends on: 001_initial_schema.sql
+
+-- ============================================================================
+-- Columns
+-- ============================================================================
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS feed_full_text BOOLEAN;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS feed_coverage_samples JSONB NOT NULL DEFAULT '[]'::jsonb;
+
+COMMENT ON COLUMN sources.feed_full_text IS 'Whether feed entries contain the full article (NULL = not yet learned)';
+COMMENT ON COLUMN sources.feed_coverage_samples IS 'Recent feed-to-article word coverage ratios, newest first';
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 008_full_text_feeds.sql completed successfully';
+    RAISE NOTICE 'Added sources.feed_full_text, feed_coverage_samples';
+END $$;
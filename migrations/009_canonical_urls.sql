@@ -0,0 +1,28 @@
+-- Migration 009: Canonical Document URLs
+-- Stores a canonical form of each document URL (scheme, www./m. prefixes,
+-- tracking parameters and trailing slashes normalized away) so ingest can
+-- skip URL variants of articles it already has
+-- Depends on: 001_initial_schema.sql
+-- Backfill existing rows with: python scripts/utils/backfill_canonical_urls.py
+
+-- ============================================================================
+-- Columns
+-- ============================================================================
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS canonical_url TEXT;
+
+COMMENT ON COLUMN documents.canonical_url IS 'Canonical form of url (lib/url_canonicalizer.py) used for cross-feed deduplication';
+
+-- ============================================================================
+-- Indexes
+-- ============================================================================
+-- Not unique: documents ingested before this migration may share a canonical URL
+CREATE INDEX IF NOT EXISTS idx_documents_canonical_url ON documents(canonical_url);
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 009_canonical_urls.sql completed successfully';
+    RAISE NOTICE 'Added documents.canonical_url - run scripts/utils/backfill_canonical_urls.py next';
+END $$;
@@ -0,0 +1,43 @@
+-- Migration 010: Work Queue Views
+-- Views returning only the rows each agent still has to process, so agents
+-- page through new work instead of diffing whole tables client-side
+-- Depends on: 001_initial_schema.sql, 002_indexes_and_constraints.sql,
+--             006_near_duplicate_fingerprints.sql
+
+-- ============================================================================
+-- Views
+-- ============================================================================
+
+-- Documents without an extraction (near-duplicates never go downstream)
+-- Anti-join served by idx_extractions_document_id
+CREATE OR REPLACE VIEW documents_pending_extraction
+WITH (security_invoker = on) AS
+SELECT d.*
+FROM documents d
+WHERE d.duplicate_of IS NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM extractions e WHERE e.document_id = d.id
+  );
+
+COMMENT ON VIEW documents_pending_extraction IS 'Documents the extraction agent has not processed yet; page with ORDER BY id, id > last_id';
+
+-- Extractions without a summary
+-- Anti-join served by idx_summaries_extraction_id
+CREATE OR REPLACE VIEW extractions_pending_analysis
+WITH (security_invoker = on) AS
+SELECT e.*
+FROM extractions e
+WHERE NOT EXISTS (
+    SELECT 1 FROM summaries s WHERE s.extraction_id = e.id
+);
+
+COMMENT ON VIEW extractions_pending_analysis IS 'Extractions the analysis agent has not summarized yet; page with ORDER BY id, id > last_id';
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 010_work_queue_views.sql completed successfully';
+    RAISE NOTICE 'Created views documents_pending_extraction, extractions_pending_analysis';
+END $$;
@@ -0,0 +1,40 @@
+-- Migration 011: One Extraction per Document
+-- Makes extractions.document_id unique so the extraction agent can bulk
+-- upsert with ON CONFLICT (document_id) instead of select-then-write per row
+-- Depends on: 001_initial_schema.sql, 002_indexes_and_constraints.sql
+
+-- ============================================================================
+-- Remove duplicate extractions
+-- ============================================================================
+-- Keep one row per document: prefer a row that already has a summary, then
+-- the most recent extraction (deleting a row cascades to its summaries)
+DELETE FROM extractions e
+USING (
+    SELECT x.id,
+           ROW_NUMBER() OVER (
+               PARTITION BY x.document_id
+               ORDER BY EXISTS (SELECT 1 FROM summaries s WHERE s.extraction_id = x.id) DESC,
+                        x.extracted_at DESC,
+                        x.created_at DESC
+           ) AS rn
+    FROM extractions x
+) ranked
+WHERE e.id = ranked.id
+  AND ranked.rn > 1;
+
+-- ============================================================================
+-- Constraints
+-- ============================================================================
+ALTER TABLE extractions ADD CONSTRAINT uq_extractions_document_id UNIQUE (document_id);
+
+-- The unique constraint's index replaces the plain lookup index
+DROP INDEX IF EXISTS idx_extractions_document_id;
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 011_extractions_unique_document.sql completed successfully';
+    RAISE NOTICE 'Added unique constraint uq_extractions_document_id';
+END $$;
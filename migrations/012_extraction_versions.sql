@@ -0,0 +1,59 @@
+-- Migration 012: Extraction Versions
+-- Records which document content and which cleaner/segmenter versions each
+-- extraction was built from, so --reprocess only redoes outdated rows
+-- Depends on: 001_initial_schema.sql, 006_near_duplicate_fingerprints.sql
+
+-- ============================================================================
+-- Columns
+-- ============================================================================
+ALTER TABLE extractions ADD COLUMN IF NOT EXISTS source_content_hash TEXT;
+ALTER TABLE extractions ADD COLUMN IF NOT EXISTS cleaner_version TEXT;
+ALTER TABLE extractions ADD COLUMN IF NOT EXISTS segmenter_version TEXT;
+
+COMMENT ON COLUMN extractions.source_content_hash IS 'documents.content_hash the extraction was built from';
+COMMENT ON COLUMN extractions.cleaner_version IS 'CLEANER_VERSION (lib/text_cleaner.py) that produced cleaned_text';
+COMMENT ON COLUMN extractions.segmenter_version IS 'SEGMENTER_VERSION (lib/text_segmenter.py) that produced sections';
+
+-- Existing extractions were produced by the v1 cleaner and segmenter
+UPDATE extractions e
+SET source_content_hash = d.content_hash,
+    cleaner_version = 'v1',
+    segmenter_version = 'v1'
+FROM documents d
+WHERE d.id = e.document_id
+  AND e.cleaner_version IS NULL;
+
+-- ============================================================================
+-- Views
+-- ============================================================================
+
+-- Extracted documents with what their extraction was built from; filter on
+-- content_changed and the version columns to find outdated extractions
+CREATE OR REPLACE VIEW extraction_state
+WITH (security_invoker = on) AS
+SELECT d.id AS document_id,
+       d.title,
+       d.content_hash,
+       d.raw_content,
+       e.id AS extraction_id,
+       e.cleaned_text,
+       e.word_count,
+       e.reading_time_minutes,
+       e.source_content_hash,
+       e.cleaner_version,
+       e.segmenter_version,
+       (e.source_content_hash IS DISTINCT FROM d.content_hash) AS content_changed
+FROM documents d
+JOIN extractions e ON e.document_id = d.id
+WHERE d.duplicate_of IS NULL;
+
+COMMENT ON VIEW extraction_state IS 'Per-document extraction provenance for incremental reprocessing; page with ORDER BY document_id';
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 012_extraction_versions.sql completed successfully';
+    RAISE NOTICE 'Added extractions.source_content_hash, cleaner_version, segmenter_version and view extraction_state';
+END $$;
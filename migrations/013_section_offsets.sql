@@ -0,0 +1,45 @@
+-- Migration 013: Offset-Based Sections
+-- Rewrites extractions.sections from copied {heading, content} objects to
+-- {heading, start, end} character offsets into cleaned_text, so each
+-- extraction stores its text once
+-- Depends on: 001_initial_schema.sql, 012_extraction_versions.sql
+
+-- ============================================================================
+-- Convert existing sections
+-- ============================================================================
+-- Offsets are 0-based character positions (Python slicing: cleaned_text[start:end]).
+-- Rows where a section's content can't be located in cleaned_text are left
+-- as they are (segmenter_version stays v1); `extraction_agent.py --reprocess`
+-- re-segments those from cleaned_text.
+UPDATE extractions e
+SET sections = (
+        SELECT COALESCE(jsonb_agg(
+                   jsonb_build_object(
+                       'heading', t.section->'heading',
+                       'start', strpos(e.cleaned_text, t.section->>'content') - 1,
+                       'end', strpos(e.cleaned_text, t.section->>'content') - 1
+                              + char_length(t.section->>'content')
+                   ) ORDER BY t.ord
+               ), '[]'::jsonb)
+        FROM jsonb_array_elements(e.sections) WITH ORDINALITY AS t(section, ord)
+    ),
+    segmenter_version = 'v2'
+WHERE jsonb_typeof(e.sections) = 'array'
+  AND EXISTS (
+      SELECT 1 FROM jsonb_array_elements(e.sections) s WHERE s ? 'content'
+  )
+  AND NOT EXISTS (
+      SELECT 1 FROM jsonb_array_elements(e.sections) s
+      WHERE NOT (s ? 'content') OR strpos(e.cleaned_text, s->>'content') = 0
+  );
+
+COMMENT ON COLUMN extractions.sections IS 'Sections as {heading, start, end} offsets into cleaned_text (see lib/text_segmenter.iter_sections)';
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 013_section_offsets.sql completed successfully';
+    RAISE NOTICE 'Converted extractions.sections to offsets - run extraction_agent.py --reprocess for any rows left at segmenter v1';
+END $$;
@@ -0,0 +1,37 @@
+-- Migration 014: Document URL on extraction_state
+-- Main-content templates are learned per domain, so full re-extractions
+-- selected from extraction_state need the document URL
+-- Depends on: 012_extraction_versions.sql
+
+-- ============================================================================
+-- Views
+-- ============================================================================
+-- Same definition as 012 with d.url appended (CREATE OR REPLACE VIEW can
+-- only add columns at the end)
+CREATE OR REPLACE VIEW extraction_state
+WITH (security_invoker = on) AS
+SELECT d.id AS document_id,
+       d.title,
+       d.content_hash,
+       d.raw_content,
+       e.id AS extraction_id,
+       e.cleaned_text,
+       e.word_count,
+       e.reading_time_minutes,
+       e.source_content_hash,
+       e.cleaner_version,
+       e.segmenter_version,
+       (e.source_content_hash IS DISTINCT FROM d.content_hash) AS content_changed,
+       d.url
+FROM documents d
+JOIN extractions e ON e.document_id = d.id
+WHERE d.duplicate_of IS NULL;
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 014_extraction_state_url.sql completed successfully';
+    RAISE NOTICE 'Added url to view extraction_state';
+END $$;
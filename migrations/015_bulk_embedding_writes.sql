@@ -0,0 +1,36 @@
+-- Migration 015: Bulk Embedding Writes
+-- Adds an RPC that stores many extraction embeddings in one statement, so
+-- the embedding agent writes a batch of vectors in one round trip instead
+-- of one PostgREST update per extraction
+-- Depends on: 001_initial_schema.sql
+
+-- ============================================================================
+-- Function: set_extraction_embeddings
+-- ============================================================================
+-- ids[i] gets embeddings[i]. Vectors are passed as pgvector text literals
+-- ('[0.0123457,-0.00456789,...]'), which are shorter on the wire than JSON
+-- float arrays and are parsed by the vector input function directly.
+-- Returns the ids that were updated; ids with no extraction row are absent.
+-- SECURITY INVOKER: the caller's RLS policies on extractions apply.
+CREATE OR REPLACE FUNCTION set_extraction_embeddings(ids UUID[], embeddings TEXT[])
+RETURNS SETOF UUID
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+    UPDATE extractions e
+    SET embedding = v.embedding::vector(1536)
+    FROM unnest(ids, embeddings) AS v(id, embedding)
+    WHERE e.id = v.id
+    RETURNING e.id;
+$$;
+
+COMMENT ON FUNCTION set_extraction_embeddings(UUID[], TEXT[]) IS 'Bulk-set extractions.embedding from parallel id / vector-literal arrays; returns updated ids';
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 015_bulk_embedding_writes.sql completed successfully';
+    RAISE NOTICE 'Created function: set_extraction_embeddings(ids, embeddings)';
+END $$;
@@ -0,0 +1,38 @@
+-- Migration 016: Summary Reanalysis
+-- Lets the extraction agent flag summaries whose extraction was re-extracted
+-- with different cleaned text, so the analysis agent picks them up again
+-- Depends on: 001_initial_schema.sql, 010_work_queue_views.sql
+
+-- ============================================================================
+-- Columns
+-- ============================================================================
+ALTER TABLE summaries ADD COLUMN IF NOT EXISTS needs_reanalysis BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMENT ON COLUMN summaries.needs_reanalysis IS 'Set when the extraction''s cleaned_text changed after analysis; cleared when the summary is rewritten';
+
+-- ============================================================================
+-- Views
+-- ============================================================================
+
+-- Extractions without an up-to-date summary
+-- Anti-join served by idx_summaries_extraction_id
+CREATE OR REPLACE VIEW extractions_pending_analysis
+WITH (security_invoker = on) AS
+SELECT e.*
+FROM extractions e
+WHERE NOT EXISTS (
+    SELECT 1 FROM summaries s
+    WHERE s.extraction_id = e.id
+      AND NOT s.needs_reanalysis
+);
+
+COMMENT ON VIEW extractions_pending_analysis IS 'Extractions the analysis agent has not summarized yet, or whose summary needs reanalysis; page with ORDER BY id, id > last_id';
+
+-- ============================================================================
+-- Success Message
+-- ============================================================================
+DO $$
+BEGIN
+    RAISE NOTICE 'Migration 016_summary_reanalysis.sql completed successfully';
+    RAISE NOTICE 'Added summaries.needs_reanalysis and updated view extractions_pending_analysis';
+END $$;
@@ -14,6 +14,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from lib.supabase_client import get_supabase_client
+from lib.row_stream import iter_rows
 from lib.anthropic_client import analyze_text, analyze_text_batch, get_anthropic_client, PROMPT_VERSION
 from lib.json_validator import validate_analysis_json, repair_analysis_json, get_analysis_stats
 
@@ -45,20 +46,6 @@ class AnalysisAgent:
         self.limit = limit
         self.logger = logging.getLogger(__name__)
 
-    def _fetch_all_ids(self, table: str, column: str) -> set:
-        """Fetch all values from a single column with pagination to avoid row limits."""
-        all_ids = set()
-        page_size = 1000
-        offset = 0
-        while True:
-            result = self.supabase.table(table).select(column).range(offset, offset + page_size - 1).execute()
-            rows = result.data or []
-            all_ids.update(r[column] for r in rows)
-            if len(rows) < page_size:
-                break
-            offset += page_size
-        return all_ids
-
     def fetch_extractions_to_process(self) -> List[Dict[str, Any]]:
         """
         Get extractions that need analysis
@@ -73,37 +60,15 @@ class AnalysisAgent:
             ).eq('id', self.extraction_id).execute()
             return result.data if result.data else []
 
-        if self.reprocess:
-            query = self.supabase.table('extractions').select(
-                'id, document_id, cleaned_text, word_count, documents(title, author, published_at, url)'
-            )
-            if self.limit:
-                query = query.limit(self.limit)
-            result = query.execute()
-            return result.data if result.data else []
-
-        # Use set difference to avoid not_.in_() with thousands of IDs (causes 400 URL-too-long)
-        all_extraction_ids = self._fetch_all_ids('extractions', 'id')
-        summarized_ids = self._fetch_all_ids('summaries', 'extraction_id')
-        unprocessed_ids = list(all_extraction_ids - summarized_ids)
-
-        if not unprocessed_ids:
-            return []
-
-        if self.limit:
-            unprocessed_ids = unprocessed_ids[:self.limit]
-
-        # Fetch full extraction records in batches of 50 to stay within URL limits
-        batch_size = 50
-        all_extractions = []
-        for i in range(0, len(unprocessed_ids), batch_size):
-            batch = unprocessed_ids[i:i + batch_size]
-            result = self.supabase.table('extractions').select(
-                'id, document_id, cleaned_text, word_count, documents(title, author, published_at, url)'
-            ).in_('id', batch).execute()
-            all_extractions.extend(result.data or [])
-
-        return all_extractions
+        # Rows are streamed by id (keyset); the list is bounded by limit. New
+        # work comes from the extractions_pending_analysis view, so a run costs
+        # O(pending extractions) rather than O(corpus)
+        table = 'extractions' if self.reprocess else 'extractions_pending_analysis'
+        return list(iter_rows(
+            self.supabase, table,
+            columns='id, document_id, cleaned_text, word_count, documents(title, author, published_at, url)',
+            limit=self.limit
+        ))
 
     def process_extraction(self, extraction: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -195,7 +160,8 @@ class AnalysisAgent:
                     "analysis_json": analysis_json,
                     "model_used": model_used,
                     "prompt_version": prompt_version,
-                    "analyzed_at": datetime.now().isoformat()
+                    "analyzed_at": datetime.now().isoformat(),
+                    "needs_reanalysis": False
                 }
 
                 # Check if summary already exists (for reprocess case)
@@ -336,6 +302,7 @@ class AnalysisAgent:
                 "model_used":    "claude-haiku-4-20250514",
                 "prompt_version": PROMPT_VERSION,
                 "analyzed_at":   datetime.now().isoformat(),
+                "needs_reanalysis": False,
             }
 
             # Upsert into summaries table
@@ -6,20 +6,71 @@ Embedding Agent - Generate vector embeddings for extracted text
 import sys
 import argparse
 import logging
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
+from openai import AuthenticationError, PermissionDeniedError
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from lib.supabase_client import get_supabase_client
-from lib.embedding_generator import generate_embedding, generate_embeddings_batch
+from lib.embedding_generator import (
+    generate_embeddings_batch, plan_batches, encode_vector, MAX_INPUTS_PER_REQUEST, MAX_TOKENS_PER_REQUEST, DEFAULT_BATCH_TOKENS
+)
+from lib.row_stream import iter_rows
+
+# Errors that would fail every request alike, so splitting the batch can't help
+UNSPLITTABLE_ERRORS = (AuthenticationError, PermissionDeniedError)
+
+def _embed_in_worker(texts: List[str]) -> Tuple[List[Optional[List[float]]], Dict[int, str]]:
+    """
+    Embed texts on a worker thread, returning results instead of raising
+
+    A failed request is split in half and each half retried, down to single
+    inputs, so an input the API rejects (e.g. over the per-input token
+    limit) only fails itself rather than its whole packed batch.
+
+    Args:
+        texts: Texts to embed
+
+    Returns:
+        (embeddings with None for failed inputs, input index -> error)
+    """
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    errors: Dict[int, str] = {}
+
+    def embed(start: int, end: int) -> None:
+        try:
+            embeddings[start:end] = generate_embeddings_batch(texts[start:end])
+        except Exception as e:
+            if end - start == 1 or isinstance(e, UNSPLITTABLE_ERRORS):
+                for i in range(start, end):
+                    errors[i] = str(e)
+                return
+            logging.getLogger(__name__).warning(f"Embedding request of {end - start} texts failed, splitting: {str(e)}")
+            middle = (start + end) // 2
+            embed(start, middle)
+            embed(middle, end)
+
+    embed(0, len(texts))
+    return embeddings, errors
 
 class EmbeddingAgent:
     """Main embedding agent class"""
 
-    def __init__(self, supabase, dry_run: bool = False, reprocess: bool = False, batch_size: int = 10):
+    # Extractions read per request while streaming texts
+    FETCH_PAGE_SIZE = 100
+
+    # Vectors per write request (~18KB each encoded, so ~3.5MB per request)
+    WRITE_CHUNK_SIZE = 200
+
+    def __init__(self, supabase, dry_run: bool = False, reprocess: bool = False,
+                 batch_size: int = MAX_INPUTS_PER_REQUEST, max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+                 concurrency: int = 4):
         """
         Initialize embedding agent
 
@@ -27,36 +78,49 @@ class EmbeddingAgent:
             supabase: Supabase client
             dry_run: If True, don't write to database
             reprocess: If True, regenerate embeddings for all extractions
-            batch_size: Number of texts to process in a single API call (max 2048)
+            batch_size: Maximum texts per API call (max 2048)
+            max_batch_tokens: Estimated token budget per API call (capped at the API's 300,000)
+            concurrency: Embedding requests in flight at once
         """
         self.supabase = supabase
         self.dry_run = dry_run
         self.reprocess = reprocess
-        self.batch_size = min(batch_size, 2048)  # OpenAI limit
+        self.batch_size = max(1, min(batch_size, MAX_INPUTS_PER_REQUEST))  # OpenAI limit
+        self.max_batch_tokens = max(1, min(max_batch_tokens, MAX_TOKENS_PER_REQUEST))
+        self.concurrency = max(1, concurrency)
         self.logger = logging.getLogger(__name__)
 
-    def fetch_extractions_to_process(self) -> List[Dict[str, Any]]:
+    def _pending_filter(self):
+        """Query filter selecting extractions that need embeddings"""
+        if self.reprocess:
+            return None
+        # Extractions without embeddings (embedding is NULL)
+        return lambda q: q.is_('embedding', 'null')
+
+    def fetch_extractions_to_process(self, columns: str = 'id, cleaned_text, word_count') -> Iterator[Dict[str, Any]]:
         """
-        Get extractions that need embeddings
+        Stream extractions that need embeddings, page by page (keyset on id)
+
+        Args:
+            columns: Columns to read
 
         Returns:
-            List of extraction records
+            Iterator of extraction records
         """
-        if self.reprocess:
-            # Get all extractions
-            result = self.supabase.table('extractions').select('*').execute()
-        else:
-            # Get extractions without embeddings (embedding is NULL)
-            result = self.supabase.table('extractions').select('*').is_('embedding', 'null').execute()
+        return iter_rows(self.supabase, 'extractions', columns=columns,
+                         page_size=self.FETCH_PAGE_SIZE, filters=self._pending_filter())
 
-        return result.data if result.data else []
-
-    def process_batch(self, extractions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def process_batch(self, extractions: List[Dict[str, Any]],
+                      embeddings: Optional[List[Optional[List[float]]]] = None,
+                      errors: Optional[Dict[int, str]] = None) -> Dict[str, Any]:
         """
-        Process a batch of extractions - generate embeddings
+        Process a batch of extractions - generate embeddings and store them
 
         Args:
             extractions: List of extraction records
+            embeddings: Embeddings for the batch if already generated (by a worker
+                        thread), None for extractions that failed
+            errors: Extraction index -> embedding error, for the failed ones
 
         Returns:
             Processing stats dict
@@ -71,45 +135,70 @@ class EmbeddingAgent:
         try:
             self.logger.info(f"Processing batch of {len(extractions)} extractions")
 
-            # Extract texts
-            texts = [ext['cleaned_text'] for ext in extractions]
-
-            # Generate embeddings in batch
-            embeddings = generate_embeddings_batch(texts)
-
-            # Update each extraction
-            for extraction, embedding in zip(extractions, embeddings):
-                try:
-                    if self.dry_run:
-                        self.logger.info(f"[DRY RUN] Would update extraction {extraction['id'][:8]}... with {len(embedding)}-dim embedding")
-                        stats["success"] += 1
-                    else:
-                        # Update extraction with embedding
-                        # Convert list to pgvector format (PostgreSQL array)
-                        result = self.supabase.table('extractions').update({
-                            'embedding': embedding
-                        }).eq('id', extraction['id']).execute()
-
-                        if result.data:
-                            self.logger.info(f"Updated embedding for extraction {extraction['id'][:8]}...")
-                            stats["success"] += 1
-                        else:
-                            raise Exception("Update returned no data")
-
-                except Exception as e:
-                    error_msg = f"Extraction {extraction['id'][:8]}...: {str(e)}"
-                    self.logger.error(f"Error updating extraction: {error_msg}")
-                    stats["failed"] += 1
-                    stats["errors"].append(error_msg)
+            if embeddings is None:
+                # Generate embeddings in batch
+                embeddings, errors = _embed_in_worker([ext['cleaned_text'] or '' for ext in extractions])
+
+            for i, error in sorted((errors or {}).items()):
+                error_msg = f"Extraction {extractions[i]['id'][:8]}...: embedding failed: {error}"
+                self.logger.error(error_msg)
+                stats["failed"] += 1
+                stats["errors"].append(error_msg)
+
+            embedded = [(extraction, embedding) for extraction, embedding in zip(extractions, embeddings)
+                        if embedding is not None]
+            if self.dry_run:
+                for extraction, embedding in embedded:
+                    self.logger.info(f"[DRY RUN] Would update extraction {extraction['id'][:8]}... with {len(embedding)}-dim embedding")
+                    stats["success"] += 1
+            else:
+                pairs = [(extraction['id'], embedding) for extraction, embedding in embedded]
+                for i in range(0, len(pairs), self.WRITE_CHUNK_SIZE):
+                    self.write_embeddings(pairs[i:i + self.WRITE_CHUNK_SIZE], stats)
 
         except Exception as e:
             error_msg = f"Batch processing failed: {str(e)}"
             self.logger.error(error_msg)
-            stats["failed"] = len(extractions)
+            stats["failed"] = len(extractions) - stats["success"]
             stats["errors"].append(error_msg)
 
         return stats
 
+    def write_embeddings(self, pairs: List[Tuple[str, List[float]]], stats: Dict[str, Any]) -> None:
+        """
+        Store embeddings with one set_extraction_embeddings call (migration 015)
+
+        If the call is rejected as a whole, the pairs are retried one by one
+        so one bad vector cannot fail its neighbours.
+
+        Args:
+            pairs: (extraction id, embedding) pairs
+            stats: Batch stats dict, updated in place
+        """
+        try:
+            result = self.supabase.rpc('set_extraction_embeddings', {
+                'ids': [extraction_id for extraction_id, _ in pairs],
+                'embeddings': [encode_vector(embedding) for _, embedding in pairs]
+            }).execute()
+            updated, write_error = set(result.data or []), "Update returned no data"
+        except Exception as e:
+            if len(pairs) > 1:
+                self.logger.warning(f"Bulk embedding write of {len(pairs)} failed, retrying one by one: {str(e)}")
+                for pair in pairs:
+                    self.write_embeddings([pair], stats)
+                return
+            updated, write_error = set(), str(e)
+
+        for extraction_id, _ in pairs:
+            if extraction_id in updated:
+                self.logger.info(f"Updated embedding for extraction {extraction_id[:8]}...")
+                stats["success"] += 1
+            else:
+                error_msg = f"Extraction {extraction_id[:8]}...: {write_error}"
+                self.logger.error(f"Error updating extraction: {error_msg}")
+                stats["failed"] += 1
+                stats["errors"].append(error_msg)
+
     def run(self) -> Dict[str, Any]:
         """
         Run the full embedding generation process
@@ -123,21 +212,25 @@ class EmbeddingAgent:
             "failed": 0,
             "total_tokens_estimated": 0,
             "estimated_cost": 0.0,
+            "requests": 0,
             "errors": []
         }
 
-        # Fetch extractions
-        extractions = self.fetch_extractions_to_process()
+        # First pass reads word counts only, for the estimate
+        total_extractions = 0
+        total_words = 0
+        for extraction in self.fetch_extractions_to_process(columns='id, word_count'):
+            total_extractions += 1
+            total_words += extraction['word_count'] or 0
 
-        if not extractions:
+        if not total_extractions:
             self.logger.warning("No extractions to process")
             return summary
 
-        self.logger.info(f"Found {len(extractions)} extraction{'s' if len(extractions) != 1 else ''} to process")
-        print(f"📋 Found {len(extractions)} extraction{'s' if len(extractions) != 1 else ''} to process")
+        self.logger.info(f"Found {total_extractions} extraction{'s' if total_extractions != 1 else ''} to process")
+        print(f"📋 Found {total_extractions} extraction{'s' if total_extractions != 1 else ''} to process")
 
         # Estimate tokens and cost
-        total_words = sum(ext['word_count'] for ext in extractions)
         estimated_tokens = int(total_words * 1.3)  # ~1.3 tokens per word
         estimated_cost = (estimated_tokens / 1_000_000) * 0.02  # $0.02 per 1M tokens
 
@@ -146,24 +239,43 @@ class EmbeddingAgent:
 
         print(f"📊 Estimated: ~{estimated_tokens:,} tokens, ~${estimated_cost:.4f} cost\n")
 
-        # Process in batches
-        total_batches = (len(extractions) + self.batch_size - 1) // self.batch_size
-        print(f"Processing in {total_batches} batch{'es' if total_batches != 1 else ''}...\n")
+        # Pack texts into requests by estimated tokens and keep up to
+        # `concurrency` requests in flight; results are written on this thread
+        print(f"Packing up to {self.batch_size} texts / ~{self.max_batch_tokens:,} tokens per request, "
+              f"{self.concurrency} request{'s' if self.concurrency != 1 else ''} in flight\n")
+
+        batches = plan_batches(self.fetch_extractions_to_process(), lambda ext: ext['cleaned_text'] or '',
+                               max_tokens=self.max_batch_tokens, max_inputs=self.batch_size)
+
+        batch_num = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = {}
+            while True:
+                # Top up to the concurrency limit; only in-flight batches are held in memory
+                for batch in islice(batches, self.concurrency - len(in_flight)):
+                    batch_num += 1
+                    future = executor.submit(_embed_in_worker, [ext['cleaned_text'] or '' for ext in batch])
+                    in_flight[future] = (batch_num, batch)
+                if not in_flight:
+                    break
 
-        for i in range(0, len(extractions), self.batch_size):
-            batch = extractions[i:i + self.batch_size]
-            batch_num = (i // self.batch_size) + 1
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    num, batch = in_flight.pop(future)
+                    embeddings, errors = future.result()
 
-            print(f"[Batch {batch_num}/{total_batches}] Processing {len(batch)} extractions...")
+                    print(f"[Batch {num}] Processing {len(batch)} extractions...")
+                    stats = self.process_batch(batch, embeddings=embeddings, errors=errors)
 
-            stats = self.process_batch(batch)
+                    summary["extractions_processed"] += stats["batch_size"]
+                    summary["successful"] += stats["success"]
+                    summary["failed"] += stats["failed"]
+                    summary["errors"].extend(stats["errors"])
 
-            summary["extractions_processed"] += stats["batch_size"]
-            summary["successful"] += stats["success"]
-            summary["failed"] += stats["failed"]
-            summary["errors"].extend(stats["errors"])
+                    print(f"  ✅ Success: {stats['success']}, ❌ Failed: {stats['failed']}\n")
 
-            print(f"  ✅ Success: {stats['success']}, ❌ Failed: {stats['failed']}\n")
+        summary["requests"] = batch_num
+        print(f"Embedded in {batch_num} request{'s' if batch_num != 1 else ''}\n")
 
         return summary
 
@@ -206,8 +318,13 @@ def main():
                        help="Run without writing to database")
     parser.add_argument("--reprocess", action="store_true",
                        help="Regenerate embeddings for all extractions")
-    parser.add_argument("--batch-size", type=int, default=10,
-                       help="Number of texts to process per API call (default: 10, max: 2048)")
+    parser.add_argument("--batch-size", type=int, default=MAX_INPUTS_PER_REQUEST,
+                       help="Maximum texts per API call (default/max: 2048)")
+    parser.add_argument("--max-batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS,
+                       help=f"Estimated token budget per API call (default: {DEFAULT_BATCH_TOKENS:,}, "
+                            f"max: {MAX_TOKENS_PER_REQUEST:,})")
+    parser.add_argument("--concurrency", type=int, default=4,
+                       help="Embedding API calls in flight at once (default: 4)")
     args = parser.parse_args()
 
     # Setup logging
@@ -220,7 +337,8 @@ def main():
     mode = "DRY RUN (no database writes)" if args.dry_run else "LIVE (writing to database)"
     print(f"Mode: {mode}")
     print(f"Model: text-embedding-3-small (1536 dimensions)")
-    print(f"Batch size: {args.batch_size}")
+    print(f"Batching: up to {args.batch_size} texts / ~{args.max_batch_tokens:,} tokens per call, "
+          f"{args.concurrency} concurrent")
     if args.reprocess:
         print(f"Reprocessing: All extractions")
     else:
@@ -251,7 +369,9 @@ def main():
         supabase=supabase,
         dry_run=args.dry_run,
         reprocess=args.reprocess,
-        batch_size=args.batch_size
+        batch_size=args.batch_size,
+        max_batch_tokens=args.max_batch_tokens,
+        concurrency=args.concurrency
     )
 
     summary = agent.run()
@@ -263,6 +383,7 @@ def main():
     print(f"Extractions processed: {summary['extractions_processed']}")
     print(f"Successful:           {summary['successful']}")
     print(f"Failed:               {summary['failed']}")
+    print(f"API requests:         {summary['requests']}")
     print(f"Estimated tokens:     ~{summary['total_tokens_estimated']:,}")
     print(f"Estimated cost:       ~${summary['estimated_cost']:.4f}")
 
@@ -6,7 +6,9 @@ Extraction Agent - Clean HTML and extract structured text from documents
 import sys
 import argparse
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
@@ -14,75 +16,203 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from lib.supabase_client import get_supabase_client
-from lib.text_cleaner import clean_html, calculate_word_count, calculate_reading_time, extract_metadata
-from lib.text_segmenter import segment_text, create_summary_excerpt
+from lib.batch_writer import BatchWriter
+from lib.content_templates import ContentTemplateStore, content_domain
+from lib.row_stream import iter_rows, count_rows
+from lib.text_cleaner import process_html, CLEANER_VERSION
+from lib.text_segmenter import segment_text, SEGMENTER_VERSION
+
+def extract_content(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a document into extraction fields (CPU-bound, no I/O)
+
+    Documents carrying an existing extraction's cleaned_text (up-to-date
+    cleaning, outdated segmentation) are only re-segmented; otherwise the
+    raw HTML is cleaned and segmented. Module-level so it can run in
+    worker processes.
+
+    Args:
+        document: Dict with raw_content (and optionally template_path, the
+                  learned main-content selector for its domain), or with
+                  cleaned_text, word_count and reading_time_minutes of the
+                  current extraction
+
+    Returns:
+        Dict with cleaned_text, sections, word_count, reading_time_minutes,
+        content_path and template_hit
+
+    Raises:
+        ValueError: If the cleaned text is too short
+    """
+    if document.get('cleaned_text') is not None:
+        return {
+            "cleaned_text": document['cleaned_text'],
+            "sections": segment_text(document['cleaned_text']),
+            "word_count": document['word_count'],
+            "reading_time_minutes": document['reading_time_minutes'],
+            "content_path": None,
+            "template_hit": False
+        }
+
+    # Clean the main content, extract metadata and calculate metrics from one parse
+    processed = process_html(document['raw_content'], main_content=True,
+                             template_path=document.get('template_path'))
+    cleaned_text = processed.cleaned_text
+
+    if not cleaned_text or len(cleaned_text.strip()) < 100:
+        raise ValueError("Cleaned text too short (< 100 chars)")
+
+    # Segment text
+    sections = segment_text(cleaned_text)
+
+    return {
+        "cleaned_text": cleaned_text,
+        "sections": sections,
+        "word_count": processed.word_count,
+        "reading_time_minutes": processed.reading_time_minutes,
+        "content_path": processed.content_path,
+        "template_hit": processed.template_hit
+    }
+
+def _extract_in_worker(document: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Run extract_content in a worker, returning (content, error) instead of raising"""
+    try:
+        return extract_content(document), None
+    except Exception as e:
+        return None, str(e)
 
 class ExtractionAgent:
     """Main extraction agent class"""
 
-    def __init__(self, supabase, dry_run: bool = False, reprocess: bool = False):
+    # Document fields extract_content reads (the only ones sent to workers)
+    _EXTRACT_FIELDS = ('raw_content', 'cleaned_text', 'word_count', 'reading_time_minutes')
+
+    # Columns read for documents to extract
+    DOCUMENT_COLUMNS = 'id, title, url, content_hash, raw_content'
+
+    # Raw HTML can be large, so documents are fetched in small pages
+    FETCH_PAGE_SIZE = 25
+
+    # Documents extracted (and written) per step of a run
+    WINDOW_SIZE = 100
+
+    def _extract_input(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the extract_content input for a document, including its domain's template"""
+        item = {k: document.get(k) for k in self._EXTRACT_FIELDS}
+        item['template_path'] = self.templates.template_for(content_domain(document.get('url')))
+        return item
+
+    def __init__(self, supabase, dry_run: bool = False, reprocess: bool = False, workers: int = 1,
+                 write_batch_size: int = 25, force: bool = False):
         """
         Initialize extraction agent
 
         Args:
             supabase: Supabase client
             dry_run: If True, don't write to database
-            reprocess: If True, reprocess documents that already have extractions
+            reprocess: If True, also redo extractions whose document content or
+                       cleaner/segmenter version has changed
+            workers: Number of processes extracting in parallel (writes stay in this process)
+            write_batch_size: Extractions per bulk upsert request
+            force: With reprocess, redo every extraction even if it is up to date
         """
         self.supabase = supabase
         self.dry_run = dry_run
         self.reprocess = reprocess
+        self.force = force
+        self.workers = max(1, workers)
         self.logger = logging.getLogger(__name__)
 
-    def _fetch_all_ids(self, table: str, column: str) -> set:
-        """Fetch all values from a single column with pagination to avoid row limits."""
-        all_ids = set()
-        page_size = 1000
-        offset = 0
-        while True:
-            result = self.supabase.table(table).select(column).range(offset, offset + page_size - 1).execute()
-            rows = result.data or []
-            all_ids.update(r[column] for r in rows)
-            if len(rows) < page_size:
-                break
-            offset += page_size
-        return all_ids
-
-    def fetch_documents_to_process(self) -> List[Dict[str, Any]]:
-        """
-        Get documents that need extraction
+        # Learned per-domain main-content templates
+        self.templates = ContentTemplateStore()
 
-        Returns:
-            List of document records
-        """
-        if self.reprocess:
-            result = self.supabase.table('documents').select('*').execute()
-            return result.data if result.data else []
+        # Extractions are upserted in chunks keyed on the unique document_id. Rows
+        # with new cleaned text also reset the embedding, rows keeping their text
+        # don't - separate writers so every chunk has the same keys
+        self.writer = BatchWriter(supabase, 'extractions', 'document_id',
+                                  chunk_size=write_batch_size, ignore_duplicates=False)
+        self.same_text_writer = BatchWriter(supabase, 'extractions', 'document_id',
+                                            chunk_size=write_batch_size, ignore_duplicates=False)
 
-        # Use set difference to avoid not_.in_() with thousands of IDs (causes 400 URL-too-long)
-        all_doc_ids = self._fetch_all_ids('documents', 'id')
-        extracted_ids = self._fetch_all_ids('extractions', 'document_id')
-        unprocessed_ids = list(all_doc_ids - extracted_ids)
+    def _count(self, table: str, filters=None, key: str = 'id') -> Optional[int]:
+        """Row count for progress output, or None if the count query fails"""
+        try:
+            return count_rows(self.supabase, table, filters=filters, key=key)
+        except Exception as e:
+            self.logger.warning(f"Could not count {table} rows: {str(e)}")
+            return None
 
-        if not unprocessed_ids:
-            return []
+    def _stream_state(self, columns: str, filters) -> Iterator[Dict[str, Any]]:
+        """Stream extraction_state rows as document records (document_id -> id)"""
+        for row in iter_rows(self.supabase, 'extraction_state', columns=columns, key='document_id',
+                             page_size=self.FETCH_PAGE_SIZE, filters=filters):
+            row['id'] = row.pop('document_id')
+            yield row
 
-        # Fetch full document records in batches of 50 to stay within URL limits
-        batch_size = 50
-        all_documents = []
-        for i in range(0, len(unprocessed_ids), batch_size):
-            batch = unprocessed_ids[i:i + batch_size]
-            result = self.supabase.table('documents').select('*').in_('id', batch).execute()
-            all_documents.extend(result.data or [])
+    def fetch_documents_to_process(self) -> Tuple[Iterator[Dict[str, Any]], Optional[int]]:
+        """
+        Get documents that need extraction
 
-        return all_documents
+        Documents are streamed page by page (keyset on id), so memory stays
+        flat however large the corpus is. New work comes from the
+        documents_pending_extraction view, so a run costs O(pending documents)
+        rather than O(corpus). With reprocess, outdated extractions are added
+        from extraction_state: changed content or cleaner version means a full
+        re-extraction, a changed segmenter version only re-segments the stored
+        cleaned text.
 
-    def process_document(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        Returns:
+            (iterator of document records - re-segment items carry cleaned_text,
+            re-extract items carry the current text as previous_text,
+            number of documents or None if it could not be counted)
+        """
+        # Near-duplicates (duplicate_of set) never go downstream
+        if self.reprocess and self.force:
+            not_duplicate = lambda q: q.is_('duplicate_of', 'null')
+            documents = iter_rows(self.supabase, 'documents', columns=self.DOCUMENT_COLUMNS,
+                                  page_size=self.FETCH_PAGE_SIZE, filters=not_duplicate)
+            return documents, self._count('documents', not_duplicate)
+
+        pending = iter_rows(self.supabase, 'documents_pending_extraction', columns=self.DOCUMENT_COLUMNS,
+                            page_size=self.FETCH_PAGE_SIZE)
+        pending_count = self._count('documents_pending_extraction')
+        if not self.reprocess:
+            return pending, pending_count
+
+        changed_filter = lambda q: q.or_(
+            f"content_changed.is.true,cleaner_version.is.null,cleaner_version.neq.{CLEANER_VERSION}"
+        )
+        resegment_filter = lambda q: q.is_('content_changed', 'false') \
+            .eq('cleaner_version', CLEANER_VERSION) \
+            .or_(f"segmenter_version.is.null,segmenter_version.neq.{SEGMENTER_VERSION}")
+
+        changed = self._stream_state('document_id, title, url, content_hash, raw_content, '
+                                     'previous_text:cleaned_text', changed_filter)
+        resegment = self._stream_state(
+            'document_id, title, content_hash, cleaned_text, word_count, reading_time_minutes', resegment_filter
+        )
+
+        counts = [pending_count,
+                  self._count('extraction_state', changed_filter, key='document_id'),
+                  self._count('extraction_state', resegment_filter, key='document_id')]
+        print(f"♻️  Reprocess: {counts[0]} new, {counts[1]} to re-extract, "
+              f"{counts[2]} to re-segment (others up to date)\n")
+        total = None if None in counts else sum(counts)
+        return chain(pending, changed, resegment), total
+
+    def process_document(self, document: Dict[str, Any],
+                         content: Optional[Dict[str, Any]] = None,
+                         error: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a single document - extract clean text
 
+        The extraction row is buffered for a bulk upsert; write errors are
+        reported by flush_writes().
+
         Args:
             document: Document record from database
+            content: Output of extract_content if already computed (by a worker)
+            error: Extraction error from a worker, if extraction failed there
 
         Returns:
             Processing stats dict
@@ -97,24 +227,19 @@ class ExtractionAgent:
         try:
             self.logger.info(f"Processing: {document['title']}")
 
-            # Clean HTML
-            cleaned_text = clean_html(document['raw_content'])
-
-            if not cleaned_text or len(cleaned_text.strip()) < 100:
-                raise ValueError("Cleaned text too short (< 100 chars)")
-
-            # Calculate metrics
-            word_count = calculate_word_count(cleaned_text)
-            reading_time = calculate_reading_time(cleaned_text)
+            if error is not None:
+                raise ValueError(error)
+            if content is None:
+                content = extract_content(self._extract_input(document))
 
-            # Segment text
-            sections = segment_text(cleaned_text)
+            if document.get('cleaned_text') is None:
+                self.templates.record(content_domain(document.get('url')),
+                                      content["content_path"], content["template_hit"])
 
-            # Extract metadata
-            html_metadata = extract_metadata(document['raw_content'])
-
-            # Create excerpt
-            excerpt = create_summary_excerpt(cleaned_text)
+            cleaned_text = content["cleaned_text"]
+            sections = content["sections"]
+            word_count = content["word_count"]
+            reading_time = content["reading_time_minutes"]
 
             # Prepare extraction data
             extraction_data = {
@@ -123,9 +248,17 @@ class ExtractionAgent:
                 "sections": sections,
                 "word_count": word_count,
                 "reading_time_minutes": reading_time,
-                "extracted_at": datetime.now().isoformat()
+                "extracted_at": datetime.now().isoformat(),
+                "source_content_hash": document.get('content_hash'),
+                "cleaner_version": CLEANER_VERSION,
+                "segmenter_version": SEGMENTER_VERSION
             }
 
+            # New cleaned text invalidates the embedding (and the summary, see flush_writes)
+            text_changed = document.get('cleaned_text') is None and document.get('previous_text') != cleaned_text
+            if text_changed:
+                extraction_data["embedding"] = None
+
             # Insert or update extraction
             if self.dry_run:
                 stats["success"] = True
@@ -134,17 +267,8 @@ class ExtractionAgent:
                 stats["sections"] = len(sections)
                 self.logger.info(f"[DRY RUN] Would create extraction: {word_count} words, {reading_time} min read, {len(sections)} sections")
             else:
-                # Check if extraction already exists (for reprocess case)
-                existing = self.supabase.table('extractions').select('id').eq('document_id', document['id']).execute()
-
-                if existing.data:
-                    # Update existing
-                    result = self.supabase.table('extractions').update(extraction_data).eq('document_id', document['id']).execute()
-                    self.logger.info(f"Updated extraction for: {document['title']}")
-                else:
-                    # Insert new
-                    result = self.supabase.table('extractions').insert(extraction_data).execute()
-                    self.logger.info(f"Created extraction for: {document['title']}")
+                # Insert, or update in place when reprocessing (keeps id and summaries)
+                (self.writer if text_changed else self.same_text_writer).add(extraction_data)
 
                 stats["success"] = True
                 stats["word_count"] = word_count
@@ -174,38 +298,133 @@ class ExtractionAgent:
             "failed_documents": []
         }
 
-        # Fetch documents
-        documents = self.fetch_documents_to_process()
+        # Stream documents
+        documents, total = self.fetch_documents_to_process()
 
-        if not documents:
+        if total == 0:
             self.logger.warning("No documents to process")
             return summary
 
-        self.logger.info(f"Found {len(documents)} document{'s' if len(documents) != 1 else ''} to process")
-        print(f"📋 Found {len(documents)} document{'s' if len(documents) != 1 else ''} to process\n")
+        if total is not None:
+            self.logger.info(f"Found {total} document{'s' if total != 1 else ''} to process")
+            print(f"📋 Found {total} document{'s' if total != 1 else ''} to process\n")
         print("Processing documents...\n")
 
-        # Process each document
-        for i, document in enumerate(documents, 1):
-            print(f"[{i}/{len(documents)}] {document['title'][:60]}...")
-            summary["documents_processed"] += 1
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        if executor:
+            print(f"Extracting with {self.workers} worker processes\n")
 
-            stats = self.process_document(document)
+        i = 0
+        try:
+            # Work through the stream one window at a time, so only a window of
+            # documents (and their pending writes) is held in memory
+            while True:
+                window = list(islice(documents, self.WINDOW_SIZE))
+                if not window:
+                    break
+
+                if executor:
+                    # map() yields in input order, so progress output matches a sequential run
+                    extracted = executor.map(_extract_in_worker,
+                                             [self._extract_input(document) for document in window],
+                                             chunksize=4)
+                else:
+                    # Extracted in process_document
+                    extracted = [(None, None)] * len(window)
+
+                processed = {}
+                for document, (content, error) in zip(window, extracted):
+                    i += 1
+                    print(f"[{i}/{total if total is not None else '?'}] {document['title'][:60]}...")
+                    stats = self.process_document(document, content=content, error=error)
+                    self._record_stats(summary, document, stats)
+                    processed[document['id']] = (document['title'], stats)
+
+                self.flush_writes(summary, processed)
+        finally:
+            if executor:
+                executor.shutdown()
+
+        if i == 0:
+            self.logger.warning("No documents to process")
 
-            if stats["success"]:
-                summary["successful"] += 1
-                summary["total_words"] += stats.get("word_count", 0)
-                summary["total_reading_time"] += stats.get("reading_time", 0)
-                print(f"  ✅ {stats['word_count']} words, {stats['reading_time']} min read, {stats['sections']} sections\n")
-            else:
+        if not self.dry_run:
+            try:
+                self.templates.save()
+            except OSError as e:
+                self.logger.warning(f"Could not save content templates: {str(e)}")
+
+        return summary
+
+    def flush_writes(self, summary: Dict[str, Any],
+                     processed: Dict[str, Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Write any buffered extractions and move failed writes into the failure stats
+
+        When reprocessing, summaries of extractions written with new cleaned
+        text are flagged for reanalysis (migration 016).
+
+        Args:
+            summary: Run summary, updated in place
+            processed: Document id -> (title, stats from process_document)
+        """
+        self.writer.flush()
+        self.same_text_writer.flush()
+
+        if self.reprocess:
+            self.mark_for_reanalysis([row.id for row in self.writer.results
+                                      if row.status == 'written' and row.id])
+
+        for row in chain(self.writer.results, self.same_text_writer.results):
+            title, stats = processed.get(row.key, (row.key, {}))
+            if row.status == 'failed':
+                summary["successful"] -= 1
                 summary["failed"] += 1
+                summary["total_words"] -= stats.get("word_count", 0)
+                summary["total_reading_time"] -= stats.get("reading_time", 0)
                 summary["failed_documents"].append({
-                    "title": document['title'],
-                    "error": stats["error"]
+                    "title": title,
+                    "error": f"Write failed: {row.error}"
                 })
-                print(f"  ❌ Error: {stats['error']}\n")
+                print(f"  ❌ Failed to save extraction for {title[:60]}: {row.error}")
+            else:
+                self.logger.info(f"Saved extraction for: {title}")
+        self.writer.results.clear()
+        self.same_text_writer.results.clear()
 
-        return summary
+    def mark_for_reanalysis(self, extraction_ids: List[str]) -> None:
+        """
+        Flag the summaries of re-extracted extractions so the analysis agent redoes them
+
+        Args:
+            extraction_ids: Extractions whose cleaned text was rewritten
+        """
+        if not extraction_ids:
+            return
+        try:
+            self.supabase.table('summaries').update({"needs_reanalysis": True}).in_(
+                'extraction_id', extraction_ids
+            ).execute()
+        except Exception as e:
+            self.logger.warning(f"Could not flag {len(extraction_ids)} summaries for reanalysis: {str(e)}")
+
+    def _record_stats(self, summary: Dict[str, Any], document: Dict[str, Any],
+                      stats: Dict[str, Any]) -> None:
+        """Fold one document's stats into the run summary and print its result"""
+        summary["documents_processed"] += 1
+
+        if stats["success"]:
+            summary["successful"] += 1
+            summary["total_words"] += stats.get("word_count", 0)
+            summary["total_reading_time"] += stats.get("reading_time", 0)
+            print(f"  ✅ {stats['word_count']} words, {stats['reading_time']} min read, {stats['sections']} sections\n")
+        else:
+            summary["failed"] += 1
+            summary["failed_documents"].append({
+                "title": document['title'],
+                "error": stats["error"]
+            })
+            print(f"  ❌ Error: {stats['error']}\n")
 
 def setup_logging(log_dir: str = "logs") -> logging.Logger:
     """
@@ -245,7 +464,12 @@ def main():
     parser.add_argument("--dry-run", action="store_true",
                        help="Run without writing to database")
     parser.add_argument("--reprocess", action="store_true",
-                       help="Reprocess documents that already have extractions")
+                       help="Also redo extractions whose document content or cleaner/segmenter "
+                            "version is outdated (add --force to redo all)")
+    parser.add_argument("--force", action="store_true",
+                       help="With --reprocess, redo every extraction even if it is up to date")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Extract documents in N parallel processes (default: 1)")
     args = parser.parse_args()
 
     # Setup logging
@@ -257,10 +481,14 @@ def main():
     print("=" * 60)
     mode = "DRY RUN (no database writes)" if args.dry_run else "LIVE (writing to database)"
     print(f"Mode: {mode}")
-    if args.reprocess:
+    if args.reprocess and args.force:
         print(f"Reprocessing: All documents (including already extracted)")
+    elif args.reprocess:
+        print(f"Reprocessing: New documents and outdated extractions")
     else:
         print(f"Reprocessing: Only new documents")
+    if args.workers > 1:
+        print(f"Workers: {args.workers} processes")
     print()
 
     # Get Supabase client
@@ -276,7 +504,9 @@ def main():
     agent = ExtractionAgent(
         supabase=supabase,
         dry_run=args.dry_run,
-        reprocess=args.reprocess
+        reprocess=args.reprocess,
+        workers=args.workers,
+        force=args.force
     )
 
     summary = agent.run()
@@ -4,25 +4,47 @@ Ingest Agent - Fetch content from active RSS sources
 """
 
 import sys
+import time
+import uuid
 import argparse
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from lib.supabase_client import get_supabase_client
-from lib.feed_parser import parse_feed, FeedEntry
-from lib.content_hasher import calculate_content_hash
+from lib.feed_parser import iter_feed_entries, FeedEntry, FeedNotModified
+from lib.feed_cache import FeedValidatorCache
+from lib.content_hasher import (
+    calculate_content_hash, calculate_document_fingerprint, fingerprint_to_db, fingerprint_from_db,
+    NearDuplicateIndex
+)
+from lib.batch_writer import BatchWriter
+from lib.row_stream import iter_rows
+from lib.poll_scheduler import estimate_publish_interval, compute_poll_interval
+from lib.ingest_checkpoint import IngestCheckpoint
+from lib.url_canonicalizer import canonicalize_url
+from lib.full_text_detector import MAX_SAMPLES, content_coverage, record_coverage, is_full_text_feed
+
+def _published_sort_key(entry: FeedEntry) -> datetime:
+    """Sort key for newest-first ordering; undated entries sort last"""
+    return entry.published_at or datetime.min
 
 class IngestAgent:
     """Main ingest agent class"""
 
     def __init__(self, supabase, dry_run: bool = False, days_back: int = 30,
                  source_filter: Optional[str] = None, full_history: bool = False,
-                 fetch_full_content: bool = False):
+                 fetch_full_content: bool = False, workers: int = 1,
+                 use_feed_cache: bool = True, insert_batch_size: int = 25,
+                 http_cache_dir: Optional[str] = None, offline: bool = False,
+                 detect_near_duplicates: bool = True, adaptive_schedule: bool = False,
+                 feed_engine: str = 'feedparser', time_budget_minutes: Optional[float] = None,
+                 use_circuit_breaker: bool = True):
         """
         Initialize ingest agent
 
@@ -33,6 +55,17 @@ class IngestAgent:
             source_filter: If provided, only process this source by name
             full_history: If True, fetch all entries regardless of date
             fetch_full_content: If True, fetch full HTML from URLs instead of RSS summaries
+            workers: Number of sources to fetch and parse in parallel (1 = sequential)
+            use_feed_cache: If True, send conditional GETs and skip unchanged feeds
+            insert_batch_size: Number of documents written per bulk insert request
+            http_cache_dir: If provided, cache fetched article responses in this directory
+            offline: If True, serve article fetches only from the HTTP cache
+            detect_near_duplicates: If True, link near-duplicate documents to their original
+            adaptive_schedule: If True, only poll sources that are due and reschedule them
+            feed_engine: Feed parsing engine ('feedparser' or 'lxml')
+            time_budget_minutes: If provided, stop cleanly before this many minutes
+                                 and checkpoint progress so the next run resumes
+            use_circuit_breaker: If True, stop fetching articles from domains that keep failing
         """
         self.supabase = supabase
         self.dry_run = dry_run
@@ -40,15 +73,57 @@ class IngestAgent:
         self.source_filter = source_filter
         self.full_history = full_history
         self.fetch_full_content = fetch_full_content
+        self.workers = max(1, workers)
+        self.insert_batch_size = insert_batch_size
+        self.detect_near_duplicates = detect_near_duplicates
+        self.adaptive_schedule = adaptive_schedule
+        self.feed_engine = feed_engine
+        self.dedup_index: Optional[NearDuplicateIndex] = None
         self.logger = logging.getLogger(__name__)
 
+        # On-disk response cache for feeds and articles (required for offline replay)
+        if http_cache_dir or offline:
+            from lib.response_cache import ResponseCache
+            self.response_cache = ResponseCache(cache_dir=http_cache_dir, offline=offline)
+        else:
+            self.response_cache = None
+
         # Initialize URL fetcher if full content fetching enabled
+        self.circuit_breaker = None
         if self.fetch_full_content:
             from lib.url_fetcher import ArticleFetcher
-            self.fetcher = ArticleFetcher(timeout=15, max_retries=3, rate_limit_delay=1.0)
+            if use_circuit_breaker and not offline:
+                from lib.domain_breaker import DomainCircuitBreaker
+                self.circuit_breaker = DomainCircuitBreaker()
+            self.fetcher = ArticleFetcher(timeout=15, max_retries=3, rate_limit_delay=1.0,
+                                          response_cache=self.response_cache,
+                                          circuit_breaker=self.circuit_breaker)
         else:
             self.fetcher = None
 
+        # Conditional GET only makes sense for incremental runs - a full-history
+        # backfill must see every entry even if the feed itself hasn't changed,
+        # and an offline replay never talks to the server at all
+        if use_feed_cache and not full_history and not offline:
+            self.feed_cache = FeedValidatorCache()
+        else:
+            self.feed_cache = None
+
+        # Deadline and checkpoint for time-budgeted runs
+        self.deadline = None
+        self.checkpoint = None
+        if time_budget_minutes:
+            budget = time_budget_minutes * 60
+            # Leave headroom to flush buffered inserts and save state
+            self.deadline = time.monotonic() + budget - min(60, budget * 0.1)
+            if not dry_run:
+                self.checkpoint = IngestCheckpoint(signature={
+                    "days_back": None if full_history else days_back,
+                    "full_history": full_history,
+                    "source_filter": source_filter,
+                    "fetch_full_content": fetch_full_content
+                })
+
         # Calculate cutoff date
         if full_history:
             self.cutoff_date = None
@@ -66,6 +141,10 @@ class IngestAgent:
 
         if self.source_filter:
             query = query.ilike('name', f'%{self.source_filter}%')
+        elif self.adaptive_schedule:
+            # Only sources that are due (an explicit --source always runs)
+            now = datetime.now().astimezone().isoformat()
+            query = query.or_(f"next_poll_at.is.null,next_poll_at.lte.{now}")
 
         result = query.execute()
         return result.data if result.data else []
@@ -89,106 +168,477 @@ class IngestAgent:
 
         return entry.published_at >= self.cutoff_date
 
-    def document_exists(self, url: str) -> bool:
+    def fetch_existing_urls(self, urls: List[str]) -> set:
         """
-        Check if document with URL already exists
+        Find which of the given URLs already exist as documents
+
+        A URL counts as existing when a document has the same URL or the
+        same canonical URL (so tracking-parameter, http/https and www.
+        variants are caught too).
 
         Args:
-            url: Document URL
+            urls: Candidate document URLs
+
+        Returns:
+            Set of canonical URLs already present in the documents table
+        """
+        existing = set()
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        canonical_urls = list(dict.fromkeys(canonicalize_url(url) for url in unique_urls))
+
+        # One in_() lookup per chunk of 50 to stay within URL length limits.
+        # The exact-url lookup covers documents not yet backfilled with canonical_url.
+        batch_size = 50
+        for column, values in (('url', unique_urls), ('canonical_url', canonical_urls)):
+            for i in range(0, len(values), batch_size):
+                batch = values[i:i + batch_size]
+                try:
+                    result = self.supabase.table('documents').select('url') \
+                        .in_(column, batch).execute()
+                    existing.update(canonicalize_url(row['url']) for row in (result.data or []))
+                except Exception as e:
+                    self.logger.error(f"Error checking document existence: {str(e)}")
+
+        return existing
+
+    def load_fingerprint_index(self) -> NearDuplicateIndex:
+        """
+        Build the near-duplicate index from fingerprints of original documents
 
         Returns:
-            True if exists, False otherwise
+            Populated NearDuplicateIndex
+        """
+        index = NearDuplicateIndex()
+        rows = iter_rows(self.supabase, 'documents', columns='id, content_fingerprint', page_size=1000,
+                         filters=lambda q: q.not_.is_('content_fingerprint', 'null').is_('duplicate_of', 'null'))
+        for row in rows:
+            index.add(fingerprint_from_db(row['content_fingerprint']), row['id'])
+        return index
+
+    def reschedule_source(self, source: Dict[str, Any], stats: Dict[str, Any]) -> None:
+        """
+        Compute and store the next poll time for a successfully polled source
+
+        Args:
+            source: Source record that was processed
+            stats: Stats dict from process_source
         """
         try:
-            result = self.supabase.table('documents').select('id').eq('url', url).limit(1).execute()
-            return len(result.data) > 0
+            result = self.supabase.table('documents').select('published_at') \
+                .eq('source_id', source['id']) \
+                .not_.is_('published_at', 'null') \
+                .order('published_at', desc=True).limit(10).execute()
+            dates = [datetime.fromisoformat(row['published_at']) for row in (result.data or [])]
+
+            previous = source.get('poll_interval_minutes')
+            interval = compute_poll_interval(
+                publish_interval=estimate_publish_interval(dates),
+                previous_interval=timedelta(minutes=previous) if previous else None,
+                found_new=stats["new_docs"] > 0
+            )
+
+            now = datetime.now().astimezone()
+            self.supabase.table('sources').update({
+                "last_polled_at": now.isoformat(),
+                "next_poll_at": (now + interval).isoformat(),
+                "poll_interval_minutes": int(interval.total_seconds() // 60)
+            }).eq('id', source['id']).execute()
+
+            self.logger.info(f"Next poll for {source['name']} in {interval}")
         except Exception as e:
-            self.logger.error(f"Error checking document existence: {str(e)}")
-            return False
+            self.logger.warning(f"Could not reschedule {source['name']}: {str(e)}")
 
-    def process_source(self, source: Dict[str, Any]) -> Dict[str, Any]:
+    def update_feed_full_text(self, source: Dict[str, Any], samples: List[float]) -> None:
         """
-        Process a single source - fetch feed and insert documents
+        Store new feed coverage samples and the resulting full-text verdict
 
         Args:
-            source: Source record from database
-
-        Returns:
-            Processing stats dict
+            source: Source record that was processed (updated in place)
+            samples: Coverage samples, newest first
         """
-        stats = {
+        full_text = is_full_text_feed(samples)
+        try:
+            self.supabase.table('sources').update({
+                "feed_coverage_samples": samples,
+                "feed_full_text": full_text
+            }).eq('id', source['id']).execute()
+        except Exception as e:
+            self.logger.warning(f"Could not update full-text state for {source['name']}: {str(e)}")
+            return
+
+        if full_text is not None and full_text != source.get('feed_full_text'):
+            self.logger.info(f"{source['name']} feed is {'full-text' if full_text else 'excerpt-only'} "
+                             f"(coverage samples: {samples})")
+        source['feed_coverage_samples'] = samples
+        source['feed_full_text'] = full_text
+
+    def out_of_time(self) -> bool:
+        """Whether the run's time budget (if any) is used up"""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _new_source_stats(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        """Create an empty per-source stats dict"""
+        return {
             "source_name": source['name'],
             "success": False,
             "new_docs": 0,
             "skipped_docs": 0,
+            "failed_docs": 0,
+            "near_duplicate_docs": 0,
+            "fetches_skipped": 0,
+            "not_modified": False,
+            "deferred": False,
             "error": None
         }
 
+    def _print_source(self, name: str, message: str) -> None:
+        """
+        Print a per-source progress line
+
+        When sources are processed in parallel their lines interleave, so each
+        line is prefixed with the source name (and the blank separator lines
+        are dropped).
+
+        Args:
+            name: Source name
+            message: Line to print
+        """
+        if self.workers > 1:
+            print(f"  [{name}] {message.strip()}")
+        else:
+            print(message)
+
+    def process_source(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a single source - fetch feed and insert documents
+
+        Args:
+            source: Source record from database
+
+        Returns:
+            Processing stats dict
+        """
+        stats = self._new_source_stats(source)
+
+        if self.out_of_time():
+            self._print_source(source['name'], f"  ⏰ Time budget used up - deferred to next run\n")
+            stats["deferred"] = True
+            return stats
+
         try:
-            self.logger.info(f"Fetching feed: {source['rss_feed_url']}")
-            print(f"  📡 Fetching: {source['rss_feed_url']}")
+            new_entries = self.collect_new_entries(source, stats)
+            if new_entries is not None:
+                self._insert_entries(source, new_entries, stats)
+                self._report_source(stats)
+        except Exception as e:
+            self._fail_source(source, stats, e)
 
-            # Parse feed
-            entries = parse_feed(source['rss_feed_url'])
-            self.logger.info(f"Parsed {len(entries)} entries")
-            print(f"  ✅ Feed parsed ({len(entries)} entries)")
+        self._finish_feed_cache(source, stats)
+        return stats
 
-            if not entries:
-                print(f"  ⏭️  No entries found")
-                stats["success"] = True
-                return stats
+    def collect_new_entries(self, source: Dict[str, Any],
+                            stats: Dict[str, Any]) -> Optional[List[FeedEntry]]:
+        """
+        Fetch a source's feed and return the entries not stored yet
 
-            # Process each entry
+        Args:
+            source: Source record from database
+            stats: Per-source stats dict, updated in place
+
+        Returns:
+            New entries, most recently published first, or None if the source
+            is already done (feed not modified, or no entries in the window)
+
+        Raises:
+            Exception: Feed fetch/parse errors
+        """
+        self.logger.info(f"Fetching feed: {source['rss_feed_url']}")
+        self._print_source(source['name'], f"  📡 Fetching: {source['rss_feed_url']}")
+
+        # Parse feed
+        try:
+            entries = list(iter_feed_entries(
+                source['rss_feed_url'],
+                cutoff_date=None if self.full_history else self.cutoff_date,
+                cache=self.feed_cache,
+                response_cache=self.response_cache,
+                engine=self.feed_engine
+            ))
+        except FeedNotModified:
+            self.logger.info(f"Feed not modified: {source['rss_feed_url']}")
+            self._print_source(source['name'], f"  ⏭️  Not modified since last run\n")
+            stats["not_modified"] = True
+            stats["success"] = True
+            return None
+
+        self.logger.info(f"Parsed {len(entries)} entries in date window from {source['name']}")
+        self._print_source(source['name'], f"  ✅ Feed parsed ({len(entries)} entries in date window)")
+
+        if not entries:
+            self._print_source(source['name'], f"  ⏭️  No entries found")
+            stats["success"] = True
+            return None
+
+        # Check date filter
+        candidates = []
+        for entry in entries:
+            if not self.should_fetch_entry(entry):
+                stats["skipped_docs"] += 1
+                continue
+            candidates.append(entry)
+
+        # Check which already exist with a single set-based lookup
+        existing_urls = self.fetch_existing_urls([entry.url for entry in candidates])
+
+        # Drop known URLs and their variants (and repeats within the same feed)
+        new_entries = []
+        for entry in candidates:
+            canonical_url = canonicalize_url(entry.url)
+            if canonical_url in existing_urls:
+                stats["skipped_docs"] += 1
+                continue
+            existing_urls.add(canonical_url)
+            new_entries.append(entry)
+
+        # Most recently published first, so a deadline cuts off the oldest entries
+        new_entries.sort(key=_published_sort_key, reverse=True)
+        return new_entries
+
+    def _insert_entries(self, source: Dict[str, Any], entries: List[FeedEntry],
+                        stats: Dict[str, Any], first_batch: bool = True) -> None:
+        """Insert new entries (or count them in dry-run)"""
+        if self.dry_run:
             for entry in entries:
-                # Check date filter
-                if not self.should_fetch_entry(entry):
-                    stats["skipped_docs"] += 1
-                    continue
+                stats["new_docs"] += 1
+                self.logger.info(f"[DRY RUN] Would add: {entry.title}")
+        elif entries:
+            self._write_new_entries(source, entries, stats, first_batch=first_batch)
+
+    def _report_source(self, stats: Dict[str, Any]) -> None:
+        """Print a source's results and mark it successful"""
+        name = stats["source_name"]
+        self._print_source(name, f"  📝 New articles: {stats['new_docs']}")
+        self._print_source(name, f"  ⏭️  Skipped (already exist): {stats['skipped_docs']}")
+        if stats["near_duplicate_docs"]:
+            self._print_source(name, f"  🔗 Near-duplicates linked: {stats['near_duplicate_docs']}")
+        if stats["fetches_skipped"]:
+            self._print_source(name, f"  📰 Full-text feed, article fetches skipped: {stats['fetches_skipped']}")
+        if stats["failed_docs"]:
+            self._print_source(name, f"  ⚠️  Failed to insert: {stats['failed_docs']}")
+        if stats["deferred"]:
+            self._print_source(name, f"  ⏰ Time budget used up - remaining entries deferred to next run\n")
+        else:
+            self._print_source(name, f"  ✅ Processed successfully\n")
+        stats["success"] = True
+
+    def _fail_source(self, source: Dict[str, Any], stats: Dict[str, Any], error: Exception) -> None:
+        """Record a source-level error"""
+        error_msg = str(error)
+        self.logger.error(f"Error processing {source['name']}: {error_msg}")
+        self._print_source(source['name'], f"  ❌ Error: {error_msg}")
+        self._print_source(source['name'], f"  ⚠️  Skipping source (will retry next run)\n")
+        stats["error"] = error_msg
+
+    def _run_newest_first(self, sources: List[Dict[str, Any]], summary: Dict[str, Any]) -> None:
+        """
+        Under a time budget: read every feed, then insert entries newest-first across sources
 
-                # Check if already exists
-                if self.document_exists(entry.url):
-                    stats["skipped_docs"] += 1
-                    continue
+        Feeds are cheap to read compared with fetching and storing articles,
+        so all feeds are read up front and the new entries of every source
+        are merged into one queue ordered by publish date. The queue is
+        worked through in insert_batch_size rounds until the deadline, so
+        what gets deferred is the oldest content overall rather than
+        everything from the sources listed last.
 
-                # Insert document (or skip in dry-run)
-                if self.dry_run:
-                    stats["new_docs"] += 1
-                    self.logger.info(f"[DRY RUN] Would add: {entry.title}")
+        Args:
+            sources: Source records to process
+            summary: Summary stats dict, updated in place
+        """
+        pending = []  # (source, stats, new entries)
+
+        def collect(source: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[List[FeedEntry]]]:
+            stats = self._new_source_stats(source)
+            try:
+                return stats, self.collect_new_entries(source, stats)
+            except Exception as e:
+                self._fail_source(source, stats, e)
+                return stats, None
+
+        print("Reading feeds...\n")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for i, (source, (stats, new_entries)) in enumerate(
+                    zip(sources, executor.map(collect, sources)), 1):
+                print(f"[{i}/{len(sources)}] {source['name']}: "
+                      f"{len(new_entries) if new_entries is not None else 0} new")
+                if new_entries:
+                    pending.append((source, stats, new_entries))
                 else:
-                    doc_id = self.insert_document(source['id'], entry)
-                    if doc_id:
-                        stats["new_docs"] += 1
-                        self.logger.info(f"Added document: {entry.title} (ID: {doc_id[:8]}...)")
-
-            print(f"  📝 New articles: {stats['new_docs']}")
-            print(f"  ⏭️  Skipped (already exist): {stats['skipped_docs']}")
-            print(f"  ✅ Processed successfully\n")
-            stats["success"] = True
+                    # Nothing to insert (or failed) - the source is done
+                    if stats["error"] is None:
+                        stats["success"] = True
+                    self._finish_feed_cache(source, stats)
+                    self._record_source_stats(summary, source, stats)
+
+        queue = sorted(((entry, n) for n, (_, _, entries) in enumerate(pending) for entry in entries),
+                       key=lambda item: _published_sort_key(item[0]), reverse=True)
+        print(f"\nInserting {len(queue)} new entr{'ies' if len(queue) != 1 else 'y'} newest-first...\n")
+
+        remaining = [len(entries) for _, _, entries in pending]
+        for start in range(0, len(queue), self.insert_batch_size):
+            if self.out_of_time():
+                self.logger.info(f"Deadline reached, deferring {len(queue) - start} entries")
+                break
+
+            by_source: Dict[int, List[FeedEntry]] = {}
+            for entry, n in queue[start:start + self.insert_batch_size]:
+                by_source.setdefault(n, []).append(entry)
+            for n, entries in by_source.items():
+                source, stats, all_entries = pending[n]
+                try:
+                    self._insert_entries(source, entries, stats,
+                                         first_batch=remaining[n] == len(all_entries))
+                except Exception as e:
+                    self.logger.error(f"Error inserting entries of {source['name']}: {str(e)}")
+                    stats["failed_docs"] += len(entries)
+                remaining[n] -= len(entries)
+
+        for (source, stats, _), left in zip(pending, remaining):
+            # Only sources with entries still queued are resumed next run
+            if left:
+                stats["deferred"] = True
+            if self.workers == 1:
+                print(f"{source['name']}")
+            self._report_source(stats)
+            self._finish_feed_cache(source, stats)
+            self._record_source_stats(summary, source, stats)
+
+    def _write_new_entries(self, source: Dict[str, Any], entries: List[FeedEntry],
+                           stats: Dict[str, Any], first_batch: bool = True) -> None:
+        """
+        Fetch, prepare and bulk insert new feed entries for one source
 
-        except Exception as e:
-            error_msg = str(e)
-            self.logger.error(f"Error processing {source['name']}: {error_msg}")
-            print(f"  ❌ Error: {error_msg}")
-            print(f"  ⚠️  Skipping source (will retry next run)\n")
-            stats["error"] = error_msg
+        Entries are handled in chunks of insert_batch_size so at most one
+        chunk of fetched HTML is held in memory at a time. If the time budget
+        runs out, the remaining chunks are left for the next run.
 
-        return stats
+        Fetched articles are compared with their feed content to learn
+        whether the source's feed is full-text. For full-text sources only
+        the first entry is fetched (to keep the verdict current) and the
+        rest use the feed content directly.
 
-    def insert_document(self, source_id: str, entry: FeedEntry) -> Optional[str]:
+        Args:
+            source: Source record the entries belong to
+            entries: New (not yet stored) feed entries
+            stats: Per-source stats dict, updated in place
+            first_batch: Whether these are the source's first new entries
+                         this run (full-text feeds sample only the first)
         """
-        Insert document into database
+        writer = BatchWriter(self.supabase, 'documents', 'url', chunk_size=self.insert_batch_size)
+        titles = {}
+        prepared = {}
+        full_text_feed = source.get('feed_full_text') is True
+        samples = list(source.get('feed_coverage_samples') or [])
+        new_samples = 0
+
+        for i in range(0, len(entries), self.insert_batch_size):
+            if self.out_of_time():
+                stats["deferred"] = True
+                self.logger.info(f"Deadline reached, deferring {len(entries) - i} entries of {source['name']}")
+                break
+
+            chunk = entries[i:i + self.insert_batch_size]
+
+            # Fetch full articles up front - different domains are fetched in parallel
+            fetch_results = [None] * len(chunk)
+            if self.fetch_full_content and self.fetcher:
+                to_fetch = ([0] if i == 0 and first_batch else []) if full_text_feed else list(range(len(chunk)))
+                if to_fetch:
+                    fetched = self.fetcher.fetch_many([(chunk[j].url, chunk[j].content) for j in to_fetch])
+                    for j, result in zip(to_fetch, fetched):
+                        fetch_results[j] = result
+                        if result.success and new_samples < MAX_SAMPLES:
+                            coverage = content_coverage(chunk[j].content, result.html)
+                            if coverage is not None:
+                                samples = record_coverage(samples, coverage)
+                                new_samples += 1
+                stats["fetches_skipped"] += len(chunk) - len(to_fetch)
+
+            for entry, fetch_result in zip(chunk, fetch_results):
+                doc_data = self.prepare_document(source['id'], entry, fetch_result,
+                                                 use_feed_content=full_text_feed and fetch_result is None)
+                if doc_data is None:
+                    stats["failed_docs"] += 1
+                    continue
+                titles[entry.url] = entry.title
+                prepared[entry.url] = doc_data
+                writer.add(doc_data)
+
+        writer.flush()
+        for row in writer.results:
+            title = titles.get(row.key, row.key)
+            doc_data = prepared[row.key]
+            if row.status == 'written':
+                stats["new_docs"] += 1
+                if doc_data.get("duplicate_of"):
+                    stats["near_duplicate_docs"] += 1
+                    self.logger.info(f"Added near-duplicate: {title} (of {doc_data['duplicate_of'][:8]}...)")
+                else:
+                    self.logger.info(f"Added document: {title} (ID: {str(row.id)[:8]}...)")
+                continue
+
+            # Not inserted - later entries must not be linked to it
+            if self.dedup_index is not None and not doc_data.get("duplicate_of"):
+                self.dedup_index.remove(fingerprint_from_db(doc_data["content_fingerprint"]), doc_data["id"])
+            if row.status == 'duplicate':
+                stats["skipped_docs"] += 1
+            else:
+                stats["failed_docs"] += 1
+                self.logger.error(f"Error inserting document {title}: {row.error}")
+
+        if new_samples:
+            self.update_feed_full_text(source, samples)
+
+    def _finish_feed_cache(self, source: Dict[str, Any], stats: Dict[str, Any]) -> None:
+        """
+        Commit or discard staged feed validators for a processed source
+
+        Validators are only kept after a clean live run, so a failed source,
+        a failed insert, a deferred source or a dry run never causes the next
+        run to skip the feed.
+
+        Args:
+            source: Source record that was processed
+            stats: Stats dict from process_source
+        """
+        if self.feed_cache is None:
+            return
+
+        if stats["success"] and stats["failed_docs"] == 0 and not stats["deferred"] and not self.dry_run:
+            self.feed_cache.commit(source['rss_feed_url'])
+        else:
+            self.feed_cache.discard(source['rss_feed_url'])
+
+    def prepare_document(self, source_id: str, entry: FeedEntry, fetch_result=None,
+                         use_feed_content: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Build a document row for bulk insert, fetching full content if enabled
 
         Args:
             source_id: UUID of source
             entry: Parsed feed entry
+            fetch_result: Prefetched FetchResult for entry.url, if already fetched
+            use_feed_content: Use the entry's content without fetching (full-text feed)
 
         Returns:
-            Document ID if successful, None otherwise
+            Document row dict, or None if it could not be prepared
         """
         try:
             # Fetch full content if enabled
-            if self.fetch_full_content and self.fetcher:
-                result = self.fetcher.fetch_url(entry.url, fallback_content=entry.content)
+            if use_feed_content:
+                raw_content = entry.content
+                fetched_via = "rss_full_text"
+            elif self.fetch_full_content and self.fetcher:
+                result = fetch_result or self.fetcher.fetch_url(entry.url, fallback_content=entry.content)
 
                 if result.success:
                     raw_content = result.html
@@ -202,32 +652,45 @@ class IngestAgent:
                 raw_content = entry.content
                 fetched_via = "rss"
 
-            # Calculate content hash
+            # Calculate content hash and near-duplicate fingerprint (of the article text only)
             content_hash = calculate_content_hash(raw_content)
+            fingerprint = calculate_document_fingerprint(raw_content, fetched_page=fetched_via == "url_fetch",
+                                                         feed_content=entry.content)
 
-            # Prepare document data
+            # Prepare document data (id assigned here so it can be indexed before the insert)
             doc_data = {
+                "id": str(uuid.uuid4()),
                 "source_id": source_id,
                 "url": entry.url,
+                "canonical_url": canonicalize_url(entry.url),
                 "title": entry.title,
                 "author": entry.author,
                 "published_at": entry.published_at.isoformat() if entry.published_at else None,
                 "raw_content": raw_content,
                 "content_hash": content_hash,
+                "content_fingerprint": fingerprint_to_db(fingerprint),
+                # Always present: bulk inserts need the same keys on every row
+                "duplicate_of": None,
                 "metadata": {
                     "summary": entry.summary,
                     "fetched_via": fetched_via
                 }
             }
 
-            # Insert
-            result = self.supabase.table('documents').insert(doc_data).execute()
-            if result.data:
-                return result.data[0]['id']
-            return None
+            # Link near-duplicates so downstream agents skip them
+            if self.dedup_index is not None:
+                duplicate_of = self.dedup_index.find(fingerprint)
+                if duplicate_of:
+                    doc_data["duplicate_of"] = duplicate_of
+                else:
+                    # Indexed now, so a near-duplicate later in the same batch links to it;
+                    # removed again if the insert doesn't go through
+                    self.dedup_index.add(fingerprint, doc_data["id"])
+
+            return doc_data
 
         except Exception as e:
-            self.logger.error(f"Error inserting document: {str(e)}")
+            self.logger.error(f"Error preparing document {entry.url}: {str(e)}")
             return None
 
     def run(self) -> Dict[str, Any]:
@@ -241,41 +704,139 @@ class IngestAgent:
             "sources_processed": 0,
             "sources_successful": 0,
             "sources_failed": 0,
+            "sources_not_modified": 0,
             "new_documents": 0,
             "skipped_documents": 0,
+            "near_duplicate_documents": 0,
+            "sources_deferred": 0,
             "failed_sources": []
         }
 
         # Fetch sources
         sources = self.fetch_active_sources()
 
+        # Resume an interrupted run: skip finished sources, interrupted ones first
+        if self.checkpoint is not None and self.checkpoint.resumed:
+            remaining = [s for s in sources if not self.checkpoint.is_completed(s['id'])]
+            print(f"↩️  Resuming checkpointed run ({len(sources) - len(remaining)} sources already done)\n")
+            remaining.sort(key=lambda s: not self.checkpoint.is_partial(s['id']))
+            sources = remaining
+
         if not sources:
             self.logger.warning("No active sources found")
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
             return summary
 
+        if self.detect_near_duplicates and not self.dry_run:
+            try:
+                self.dedup_index = self.load_fingerprint_index()
+                self.logger.info(f"Loaded {self.dedup_index.size} fingerprints for near-duplicate detection")
+            except Exception as e:
+                self.logger.warning(f"Near-duplicate detection disabled: {str(e)}")
+                self.dedup_index = None
+
         self.logger.info(f"Found {len(sources)} active sources")
         print(f"📋 Found {len(sources)} active source{'s' if len(sources) != 1 else ''}\n")
         print("Processing sources...\n")
 
-        # Process each source
-        for i, source in enumerate(sources, 1):
-            print(f"[{i}/{len(sources)}] {source['name']}")
-            summary["sources_processed"] += 1
+        if self.deadline is not None and not self.dry_run:
+            self._run_newest_first(sources, summary)
+        elif self.workers > 1:
+            self._run_concurrent(sources, summary)
+        else:
+            # Process each source
+            for i, source in enumerate(sources, 1):
+                print(f"[{i}/{len(sources)}] {source['name']}")
+                stats = self.process_source(source)
+                self._record_source_stats(summary, source, stats)
+
+        if self.feed_cache is not None and not self.dry_run:
+            try:
+                self.feed_cache.save()
+            except OSError as e:
+                self.logger.warning(f"Could not save feed cache: {str(e)}")
+
+        if self.circuit_breaker is not None and not self.dry_run:
+            try:
+                self.circuit_breaker.save()
+            except OSError as e:
+                self.logger.warning(f"Could not save circuit breaker state: {str(e)}")
+
+        # A run that got through every source needs no resume point
+        if self.checkpoint is not None and summary["sources_deferred"] == 0:
+            self.checkpoint.clear()
+
+        return summary
 
-            stats = self.process_source(source)
+    def close(self) -> None:
+        """Release the article fetcher's threads and pooled connections"""
+        if self.fetcher is not None:
+            self.fetcher.close()
 
-            if stats["success"]:
-                summary["sources_successful"] += 1
-                summary["new_documents"] += stats["new_docs"]
-                summary["skipped_documents"] += stats["skipped_docs"]
-            else:
-                summary["sources_failed"] += 1
-                summary["failed_sources"].append({
-                    "name": source['name'],
-                    "error": stats["error"]
-                })
+    def _run_concurrent(self, sources: List[Dict[str, Any]], summary: Dict[str, Any]) -> None:
+        """
+        Process sources on a thread pool - feed fetches are network-bound
 
-        return summary
+        Args:
+            sources: Source records to process
+            summary: Summary stats dict, updated in place
+        """
+        print(f"Running with {self.workers} parallel workers\n")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.process_source, source): source for source in sources}
+
+            for i, future in enumerate(as_completed(futures), 1):
+                source = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    # process_source catches its own errors; this guards the worker itself
+                    self.logger.error(f"Worker failed for {source['name']}: {str(e)}")
+                    stats = self._new_source_stats(source)
+                    stats["error"] = str(e)
+
+                print(f"[{i}/{len(sources)}] {source['name']} done")
+                self._record_source_stats(summary, source, stats)
+
+    def _record_source_stats(self, summary: Dict[str, Any], source: Dict[str, Any],
+                             stats: Dict[str, Any]) -> None:
+        """
+        Aggregate one source's processing stats into the run summary
+
+        Args:
+            summary: Summary stats dict, updated in place
+            source: Source record that was processed
+            stats: Stats dict returned by process_source
+        """
+        summary["sources_processed"] += 1
+
+        if stats["deferred"]:
+            summary["sources_deferred"] += 1
+            summary["new_documents"] += stats["new_docs"]
+            summary["skipped_documents"] += stats["skipped_docs"]
+            summary["near_duplicate_documents"] += stats["near_duplicate_docs"]
+            if self.checkpoint is not None:
+                self.checkpoint.mark_partial(source['id'])
+        elif stats["success"]:
+            if self.checkpoint is not None:
+                self.checkpoint.mark_completed(source['id'])
+            if self.adaptive_schedule and not self.dry_run:
+                self.reschedule_source(source, stats)
+
+            summary["sources_successful"] += 1
+            if stats["not_modified"]:
+                summary["sources_not_modified"] += 1
+            summary["new_documents"] += stats["new_docs"]
+            summary["skipped_documents"] += stats["skipped_docs"]
+            summary["near_duplicate_documents"] += stats["near_duplicate_docs"]
+        else:
+            summary["sources_failed"] += 1
+            summary["failed_sources"].append({
+                "name": source['name'],
+                "error": stats["error"]
+            })
 
 def setup_logging(log_dir: str = "logs") -> logging.Logger:
     """
@@ -322,6 +883,24 @@ def main():
                        help="Fetch all historical entries (ignores --days-back)")
     parser.add_argument("--fetch-full-content", action="store_true",
                        help="Fetch full article HTML from URLs instead of RSS summaries")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Number of sources to fetch in parallel (default: 1)")
+    parser.add_argument("--no-feed-cache", action="store_true",
+                       help="Re-download every feed, ignoring ETag/Last-Modified cache")
+    parser.add_argument("--no-circuit-breaker", action="store_true",
+                       help="Keep fetching articles from domains that repeatedly fail")
+    parser.add_argument("--time-budget", type=float, metavar="MINUTES",
+                       help="Stop cleanly before MINUTES and checkpoint progress so the next run resumes")
+    parser.add_argument("--feed-engine", choices=["feedparser", "lxml"], default="feedparser",
+                       help="Feed parser: feedparser (default) or lxml (faster, falls back to feedparser)")
+    parser.add_argument("--adaptive-schedule", action="store_true",
+                       help="Only poll sources that are due, learning each source's publishing cadence")
+    parser.add_argument("--no-near-dup", action="store_true",
+                       help="Disable near-duplicate (SimHash) detection")
+    parser.add_argument("--http-cache", type=str, metavar="DIR",
+                       help="Cache fetched feeds and article HTML on disk in DIR")
+    parser.add_argument("--offline", action="store_true",
+                       help="Replay feeds and articles from the HTTP cache only, never hitting origin servers")
     args = parser.parse_args()
 
     # Setup logging
@@ -339,10 +918,20 @@ def main():
         print(f"Timeframe: Last {args.days_back} days")
     if args.source:
         print(f"Source filter: {args.source}")
+    elif args.adaptive_schedule:
+        print(f"Schedule: adaptive (only sources that are due)")
     if args.fetch_full_content:
         print(f"Content: Full HTML from URLs (with RSS fallback)")
     else:
         print(f"Content: RSS feed summaries only")
+    if args.workers > 1:
+        print(f"Workers: {args.workers} sources in parallel")
+    if args.time_budget:
+        print(f"Time budget: {args.time_budget:g} minutes (resumable)")
+    if args.offline:
+        print(f"HTTP cache: offline replay ({args.http_cache or 'default cache dir'})")
+    elif args.http_cache:
+        print(f"HTTP cache: {args.http_cache}")
     print()
 
     # Get Supabase client
@@ -361,10 +950,22 @@ def main():
         days_back=args.days_back,
         source_filter=args.source,
         full_history=args.full_history,
-        fetch_full_content=args.fetch_full_content
+        fetch_full_content=args.fetch_full_content,
+        workers=args.workers,
+        use_feed_cache=not args.no_feed_cache,
+        http_cache_dir=args.http_cache,
+        offline=args.offline,
+        detect_near_duplicates=not args.no_near_dup,
+        adaptive_schedule=args.adaptive_schedule,
+        feed_engine=args.feed_engine,
+        time_budget_minutes=args.time_budget,
+        use_circuit_breaker=not args.no_circuit_breaker
     )
 
-    summary = agent.run()
+    try:
+        summary = agent.run()
+    finally:
+        agent.close()
 
     # Print summary
     print("=" * 60)
@@ -373,8 +974,11 @@ def main():
     print(f"Sources processed:     {summary['sources_processed']}")
     print(f"Successful:           {summary['sources_successful']}")
     print(f"Failed:               {summary['sources_failed']}")
+    print(f"Unchanged feeds:      {summary['sources_not_modified']}")
+    print(f"Deferred (deadline):  {summary['sources_deferred']}")
     print(f"New documents added:  {summary['new_documents']}")
     print(f"Duplicates skipped:   {summary['skipped_documents']}")
+    print(f"Near-duplicates:      {summary['near_duplicate_documents']}")
 
     if summary['failed_sources']:
         print(f"\nFailed sources:")
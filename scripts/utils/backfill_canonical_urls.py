@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Backfill canonical URLs for existing documents
+
+Computes documents.canonical_url for rows that predate migration 009 and
+reports groups of existing documents that turn out to share a canonical URL.
+Existing duplicates are left in place; only new ingests are deduplicated.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from lib.supabase_client import get_supabase_client
+from lib.row_stream import iter_rows
+from lib.url_canonicalizer import canonicalize_url
+
+def backfill(supabase, page_size: int = 500, dry_run: bool = False) -> dict:
+    """
+    Fill in missing canonical URLs page by page
+
+    Args:
+        supabase: Supabase client
+        page_size: Documents fetched per request
+        dry_run: If True, compute but don't write
+
+    Returns:
+        Dict of canonical URL -> list of document URLs, for every canonical URL seen
+    """
+    groups = {}
+
+    rows = iter_rows(supabase, 'documents', columns='id, url', page_size=page_size,
+                     filters=lambda q: q.is_('canonical_url', 'null'))
+    for row in rows:
+        canonical = canonicalize_url(row['url'])
+        groups.setdefault(canonical, []).append(row['url'])
+        if not dry_run:
+            supabase.table('documents').update({
+                'canonical_url': canonical
+            }).eq('id', row['id']).execute()
+
+    return groups
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill document canonical URLs")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Compute canonical URLs without writing them")
+    args = parser.parse_args()
+
+    supabase = get_supabase_client()
+    print("✅ Connected to Supabase")
+
+    groups = backfill(supabase, dry_run=args.dry_run)
+    updated = sum(len(urls) for urls in groups.values())
+    action = "Would update" if args.dry_run else "Updated"
+    print(f"✅ {action} {updated} document canonical URL{'s' if updated != 1 else ''}")
+
+    duplicates = {canonical: urls for canonical, urls in groups.items() if len(urls) > 1}
+    if duplicates:
+        print(f"\n🔗 {len(duplicates)} canonical URLs shared by several existing documents:")
+        for canonical, urls in sorted(duplicates.items()):
+            print(f"  {canonical}")
+            for url in urls:
+                print(f"    - {url}")
+
+if __name__ == "__main__":
+    main()
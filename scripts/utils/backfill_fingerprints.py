@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Backfill near-duplicate fingerprints for existing documents
+
+Computes documents.content_fingerprint for rows that predate migration 006.
+Existing documents are never marked as duplicates here - linking only
+happens for newly ingested documents.
+
+Use --recompute to refresh fingerprints computed over whole pages (before
+ingest fingerprinted only the article text).
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from lib.supabase_client import get_supabase_client
+from lib.row_stream import iter_rows
+from lib.content_hasher import calculate_document_fingerprint, fingerprint_to_db
+
+def backfill(supabase, page_size: int = 100, dry_run: bool = False, recompute: bool = False) -> int:
+    """
+    Fill in missing fingerprints page by page
+
+    Args:
+        supabase: Supabase client
+        page_size: Documents fetched per request
+        dry_run: If True, compute but don't write
+        recompute: If True, recompute every fingerprint, not just missing ones
+
+    Returns:
+        Number of documents updated
+    """
+    updated = 0
+
+    rows = iter_rows(supabase, 'documents', columns='id, raw_content, content_fingerprint, metadata',
+                     page_size=page_size,
+                     filters=None if recompute else lambda q: q.is_('content_fingerprint', 'null'))
+    for row in rows:
+        metadata = row.get('metadata') or {}
+        fingerprint = fingerprint_to_db(calculate_document_fingerprint(
+            row['raw_content'] or '',
+            fetched_page=metadata.get('fetched_via') == 'url_fetch',
+            feed_content=metadata.get('summary')
+        ))
+        if fingerprint == row.get('content_fingerprint'):
+            continue
+        if not dry_run:
+            supabase.table('documents').update({
+                'content_fingerprint': fingerprint
+            }).eq('id', row['id']).execute()
+        updated += 1
+
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill document near-duplicate fingerprints")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Compute fingerprints without writing them")
+    parser.add_argument("--recompute", action="store_true",
+                       help="Recompute all fingerprints from article text, not just missing ones")
+    args = parser.parse_args()
+
+    supabase = get_supabase_client()
+    print("✅ Connected to Supabase")
+
+    updated = backfill(supabase, dry_run=args.dry_run, recompute=args.recompute)
+    action = "Would update" if args.dry_run else "Updated"
+    print(f"✅ {action} {updated} document fingerprint{'s' if updated != 1 else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark the feedparser and lxml feed parsing engines on saved feeds
+
+Usage:
+    # Save current feeds of all active sources into the corpus directory
+    python scripts/utils/benchmark_feed_parsers.py --save
+
+    # Compare both engines on the saved corpus
+    python scripts/utils/benchmark_feed_parsers.py --repeat 5
+
+    # Check the lxml engine's entries field by field against feedparser
+    python scripts/utils/benchmark_feed_parsers.py --check
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from lib.feed_parser import _parse_body, _parse_entry, FeedEntry
+from lib.fast_feed_parser import parse_entries_fast
+
+DEFAULT_CORPUS_DIR = Path(__file__).parent.parent.parent / ".cache" / "feed_corpus"
+COMPARED_FIELDS = ('title', 'url', 'author', 'published_at', 'content', 'summary')
+
+def save_corpus(corpus_dir: Path) -> int:
+    """
+    Download the feeds of all active sources into the corpus directory
+
+    Args:
+        corpus_dir: Directory to write <source-name>.xml files into
+
+    Returns:
+        Number of feeds saved
+    """
+    import re
+    import requests
+    from lib.supabase_client import get_supabase_client
+
+    supabase = get_supabase_client()
+    sources = supabase.table('sources').select('name, rss_feed_url').eq('is_active', True).execute().data or []
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    saved = 0
+    for source in sources:
+        if not source.get('rss_feed_url'):
+            continue
+        try:
+            response = requests.get(source['rss_feed_url'], timeout=30, headers={
+                'User-Agent': 'Weekly-Systems-Thinking-Brief/1.0 (Educational RSS reader; +https://github.com)'
+            })
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"  ❌ {source['name']}: {str(e)[:80]}")
+            continue
+
+        filename = re.sub(r'[^a-z0-9]+', '_', source['name'].lower()).strip('_') + '.xml'
+        (corpus_dir / filename).write_bytes(response.content)
+        print(f"  ✅ {source['name']} ({len(response.content):,} bytes)")
+        saved += 1
+
+    return saved
+
+def run_feedparser(body: bytes) -> List[FeedEntry]:
+    feed = _parse_body(body)
+    return [_parse_entry(entry, include_raw=False) for entry in feed.entries]
+
+def time_engine(fn, body: bytes, repeat: int) -> Tuple[float, object]:
+    """Return best-of-N wall time in ms and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(body)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+def count_mismatches(reference: List[FeedEntry], candidate: List[FeedEntry]) -> int:
+    """Count differing fields between two entry lists (length mismatch counts per entry)"""
+    mismatches = abs(len(reference) - len(candidate)) * len(COMPARED_FIELDS)
+    for ref, cand in zip(reference, candidate):
+        for field in COMPARED_FIELDS:
+            if getattr(ref, field) != getattr(cand, field):
+                mismatches += 1
+    return mismatches
+
+def report_parity(files: List[Path]) -> int:
+    """
+    Print every field where the lxml engine's entries differ from feedparser's
+
+    Args:
+        files: Saved feed files
+
+    Returns:
+        Number of differing fields (feeds the lxml engine hands to feedparser count as equal)
+    """
+    total = 0
+    for path in files:
+        body = path.read_bytes()
+        reference = run_feedparser(body)
+        candidate = parse_entries_fast(body)
+        if candidate is None:
+            print(f"  ⏭️  {path.stem}: falls back to feedparser")
+            continue
+
+        if len(reference) != len(candidate):
+            print(f"  ❌ {path.stem}: {len(reference)} entries vs {len(candidate)}")
+            total += count_mismatches(reference, candidate)
+            continue
+
+        diffs = 0
+        for ref, cand in zip(reference, candidate):
+            for field in COMPARED_FIELDS:
+                expected, actual = getattr(ref, field), getattr(cand, field)
+                if expected != actual:
+                    diffs += 1
+                    print(f"  ❌ {path.stem} / {ref.title[:40]} / {field}: "
+                          f"feedparser={str(expected)[:60]!r} lxml={str(actual)[:60]!r}")
+        if not diffs:
+            print(f"  ✅ {path.stem}: {len(reference)} entries identical")
+        total += diffs
+
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feed parsing engines")
+    parser.add_argument("--corpus", type=str, default=str(DEFAULT_CORPUS_DIR),
+                       help="Directory of saved feed files (default: .cache/feed_corpus)")
+    parser.add_argument("--save", action="store_true",
+                       help="Download active source feeds into the corpus first")
+    parser.add_argument("--repeat", type=int, default=3,
+                       help="Runs per engine per feed; best time is reported (default: 3)")
+    parser.add_argument("--check", action="store_true",
+                       help="Report field-level differences from feedparser instead of timings "
+                            "(exit status 1 if any)")
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus)
+
+    if args.save:
+        print(f"📥 Saving feeds to {corpus_dir}")
+        saved = save_corpus(corpus_dir)
+        print(f"Saved {saved} feeds\n")
+
+    files = sorted(corpus_dir.glob('*.xml')) if corpus_dir.exists() else []
+    if not files:
+        print(f"❌ No feed files in {corpus_dir} (run with --save first)")
+        sys.exit(1)
+
+    if args.check:
+        diffs = report_parity(files)
+        print(f"\nFeeds: {len(files)}, differing fields: {diffs}")
+        sys.exit(1 if diffs else 0)
+
+    print("=" * 80)
+    print(f"{'Feed':<32} {'Entries':>7} {'feedparser':>12} {'lxml':>10} {'Speedup':>8} {'Diffs':>6}")
+    print("=" * 80)
+
+    total_fp = total_fast = 0.0
+    fallbacks = 0
+    for path in files:
+        body = path.read_bytes()
+        fp_ms, fp_entries = time_engine(run_feedparser, body, args.repeat)
+        fast_ms, fast_entries = time_engine(parse_entries_fast, body, args.repeat)
+
+        if fast_entries is None:
+            fallbacks += 1
+            print(f"{path.stem[:32]:<32} {len(fp_entries):>7} {fp_ms:>10.1f}ms {'fallback':>10}")
+            total_fp += fp_ms
+            total_fast += fp_ms
+            continue
+
+        total_fp += fp_ms
+        total_fast += fast_ms
+        diffs = count_mismatches(fp_entries, fast_entries)
+        speedup = fp_ms / fast_ms if fast_ms else float('inf')
+        print(f"{path.stem[:32]:<32} {len(fp_entries):>7} {fp_ms:>10.1f}ms {fast_ms:>8.1f}ms "
+              f"{speedup:>7.1f}x {diffs:>6}")
+
+    print("=" * 80)
+    speedup = total_fp / total_fast if total_fast else float('inf')
+    print(f"{'Total':<32} {'':>7} {total_fp:>10.1f}ms {total_fast:>8.1f}ms {speedup:>7.1f}x")
+    print(f"\nFeeds: {len(files)}, fell back to feedparser: {fallbacks}")
+    print("Diffs = fields that differ from feedparser (feedparser sanitizes HTML; lxml keeps it raw)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-pass HTML processing against separate clean/metadata parses
+
+Usage:
+    # Save raw HTML of recent documents into the corpus directory
+    python scripts/utils/benchmark_html_processing.py --save --limit 50
+
+    # Compare both approaches on the saved corpus
+    python scripts/utils/benchmark_html_processing.py --repeat 5
+
+    # Measure how much text main-content detection removes
+    python scripts/utils/benchmark_html_processing.py --main-content
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from lib.text_cleaner import (
+    clean_html, extract_metadata, calculate_word_count, calculate_reading_time, process_html
+)
+
+DEFAULT_CORPUS_DIR = Path(__file__).parent.parent.parent / ".cache" / "html_corpus"
+
+def save_corpus(corpus_dir: Path, limit: int) -> int:
+    """
+    Save the raw HTML of the most recently ingested documents
+
+    Args:
+        corpus_dir: Directory to write <document-id>.html files into
+        limit: Number of documents to save
+
+    Returns:
+        Number of pages saved
+    """
+    from lib.supabase_client import get_supabase_client
+
+    supabase = get_supabase_client()
+    rows = supabase.table('documents').select('id, raw_content') \
+        .order('created_at', desc=True).limit(limit).execute().data or []
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    saved = 0
+    for row in rows:
+        if not row.get('raw_content'):
+            continue
+        (corpus_dir / f"{row['id']}.html").write_text(row['raw_content'], encoding='utf-8')
+        saved += 1
+
+    return saved
+
+def run_separate(html: str) -> Tuple[str, dict, int, int]:
+    """The extraction stage's previous approach: two parses, two word splits"""
+    cleaned_text = clean_html(html)
+    return (cleaned_text, extract_metadata(html),
+            calculate_word_count(cleaned_text), calculate_reading_time(cleaned_text))
+
+def run_single(html: str) -> Tuple[str, dict, int, int]:
+    processed = process_html(html)
+    return (processed.cleaned_text, processed.metadata,
+            processed.word_count, processed.reading_time_minutes)
+
+def report_main_content(files) -> None:
+    """Compare word counts of whole-page cleaning and main-content cleaning"""
+    print("=" * 80)
+    print(f"{'Page':<38} {'Page words':>11} {'Main words':>11} {'Saved':>7}  Path")
+    print("=" * 80)
+
+    total_page = total_main = 0
+    for path in files:
+        html = path.read_text(encoding='utf-8', errors='replace')
+        page = process_html(html)
+        main = process_html(html, main_content=True)
+        total_page += page.word_count
+        total_main += main.word_count
+        saved = 1 - main.word_count / page.word_count if page.word_count else 0
+        print(f"{path.stem[:38]:<38} {page.word_count:>11,} {main.word_count:>11,} {saved:>6.0%}  "
+              f"{(main.content_path or 'whole page')[:40]}")
+
+    print("=" * 80)
+    saved = 1 - total_main / total_page if total_page else 0
+    print(f"{'Total':<38} {total_page:>11,} {total_main:>11,} {saved:>6.0%}")
+    print("\nWords approximate downstream embedding/LLM tokens (~1.3 tokens per word)")
+
+def time_approach(fn, html: str, repeat: int) -> Tuple[float, object]:
+    """Return best-of-N wall time in ms and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-pass HTML processing")
+    parser.add_argument("--corpus", type=str, default=str(DEFAULT_CORPUS_DIR),
+                       help="Directory of saved HTML files (default: .cache/html_corpus)")
+    parser.add_argument("--save", action="store_true",
+                       help="Download recent document HTML into the corpus first")
+    parser.add_argument("--limit", type=int, default=50,
+                       help="Documents to save with --save (default: 50)")
+    parser.add_argument("--repeat", type=int, default=3,
+                       help="Runs per approach per page; best time is reported (default: 3)")
+    parser.add_argument("--main-content", action="store_true",
+                       help="Report words removed by main-content detection instead of timings")
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus)
+
+    if args.save:
+        print(f"📥 Saving document HTML to {corpus_dir}")
+        saved = save_corpus(corpus_dir, args.limit)
+        print(f"Saved {saved} pages\n")
+
+    files = sorted(corpus_dir.glob('*.html')) if corpus_dir.exists() else []
+    if not files:
+        print(f"❌ No HTML files in {corpus_dir} (run with --save first)")
+        sys.exit(1)
+
+    if args.main_content:
+        report_main_content(files)
+        return
+
+    print("=" * 80)
+    print(f"{'Page':<38} {'KB':>6} {'Separate':>11} {'Single':>10} {'Speedup':>8} {'Same':>5}")
+    print("=" * 80)
+
+    total_separate = total_single = 0.0
+    mismatches = 0
+    for path in files:
+        html = path.read_text(encoding='utf-8', errors='replace')
+        separate_ms, separate_result = time_approach(run_separate, html, args.repeat)
+        single_ms, single_result = time_approach(run_single, html, args.repeat)
+
+        total_separate += separate_ms
+        total_single += single_ms
+        same = separate_result == single_result
+        if not same:
+            mismatches += 1
+
+        speedup = separate_ms / single_ms if single_ms else float('inf')
+        print(f"{path.stem[:38]:<38} {len(html) / 1024:>6.0f} {separate_ms:>9.1f}ms {single_ms:>8.1f}ms "
+              f"{speedup:>7.1f}x {'yes' if same else 'NO':>5}")
+
+    print("=" * 80)
+    speedup = total_separate / total_single if total_single else float('inf')
+    print(f"{'Total':<38} {'':>6} {total_separate:>9.1f}ms {total_single:>8.1f}ms {speedup:>7.1f}x")
+    print(f"\nPages: {len(files)}, output mismatches: {mismatches}")
+
+if __name__ == "__main__":
+    main()